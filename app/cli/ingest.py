@@ -0,0 +1,296 @@
+"""
+Bulk-ingest a corpus of texts and image URLs so they are cache hits later.
+
+    python -m app.cli.ingest corpus.jsonl [--concurrency 8] [--rate 300]
+
+Input is JSONL (one object per line) or CSV (with a header row); each record
+may carry "text" and/or "imageUrl". Records run through the same pipeline
+as /api/analyze, called directly rather than over HTTP:
+
+    - content already in the store (or seen earlier in the run) is skipped
+      after a single hash lookup, without touching the LLM
+    - LLM-bound work runs with bounded concurrency under a requests-per-minute
+      limit, and a throttled (HTTP 429) call pauses every worker with
+      exponential backoff before it is retried
+    - progress is checkpointed next to the input, so an interrupted run
+      resumes where it stopped when started again with the same arguments
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.services.analysis_pipeline import analyze_text, analyze_image
+from app.services.admission import llm_admission
+from app.services.analysis_storage_service import get_analysis_by_hash
+from app.utils.fetch_image import download_image
+from app.utils.hashing import hash_image, hash_text
+
+
+class _RateLimiter:
+    """Token bucket for LLM-bound calls, with a shared pause for throttling."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_slot = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _is_throttled(error: BaseException) -> bool:
+    while error is not None:
+        if getattr(error, "status_code", None) == 429:
+            return True
+        error = error.__cause__
+    return False
+
+
+class _Checkpoint:
+    """
+    Tracks which input records are finished.
+
+    Stored as the count of leading finished records plus the set of finished
+    records beyond it, so out-of-order completion never loses work.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        self.source = source
+        self.offset = 0
+        self.done = set()
+        self._lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if state.get("source") == source:
+                self.offset = state.get("offset", 0)
+                self.done = set(state.get("done", []))
+                print(f"⏩ Resuming from checkpoint: {self.offset + len(self.done)} records already done")
+
+    def is_done(self, index: int) -> bool:
+        return index < self.offset or index in self.done
+
+    def mark(self, index: int):
+        with self._lock:
+            self.done.add(index)
+            while self.offset in self.done:
+                self.done.remove(self.offset)
+                self.offset += 1
+
+    def save(self):
+        with self._lock:
+            state = {"source": self.source, "offset": self.offset, "done": sorted(self.done)}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.path)
+
+
+def read_records(path: str):
+    """
+    Yield (index, record) pairs from a JSONL or CSV file.
+
+    A JSONL line that is not a JSON object yields None as its record, so the
+    caller can skip it without aborting the run.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            for index, row in enumerate(csv.DictReader(f)):
+                yield index, row
+        else:
+            for index, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    yield index, {}
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"⚠️ Line {index + 1} is not valid JSON: {str(e)}")
+                    record = None
+                yield index, record if isinstance(record, dict) else None
+
+
+class Ingester:
+    def __init__(self, rate_per_minute: float, max_retries: int):
+        self.limiter = _RateLimiter(rate_per_minute)
+        self.max_retries = max_retries
+        self.seen_hashes = set()
+        self._in_flight = {}
+        self.stats = {"records": 0, "analyzed": 0, "cached": 0, "duplicates": 0, "skipped": 0, "failed": 0}
+        self._lock = threading.Lock()
+
+    def count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _claim(self, content_hash: str) -> bool:
+        """
+        Claim a hash for processing; False if it already succeeded this run.
+
+        A duplicate of a hash still being processed waits for that attempt
+        and only counts as a duplicate if it succeeded, otherwise it retries.
+        """
+        while True:
+            with self._lock:
+                if content_hash in self.seen_hashes:
+                    return False
+                pending = self._in_flight.get(content_hash)
+                if pending is None:
+                    self._in_flight[content_hash] = threading.Event()
+                    return True
+            pending.wait()
+
+    def _release(self, content_hash: str, succeeded: bool):
+        with self._lock:
+            if succeeded:
+                self.seen_hashes.add(content_hash)
+            self._in_flight.pop(content_hash).set()
+
+    def _process(self, content_hash: str, analyze, *args, **kwargs):
+        if not self._claim(content_hash):
+            self.count("duplicates")
+            return
+
+        succeeded = False
+        try:
+            if get_analysis_by_hash(content_hash):
+                self.count("cached")
+            else:
+                # The lookup above already missed, so skip the pipeline's own
+                self._with_backoff(analyze, *args, check_cache=False, **kwargs)
+                self.count("analyzed")
+            succeeded = True
+        finally:
+            self._release(content_hash, succeeded)
+
+    def _with_backoff(self, func, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                if not _is_throttled(e) or attempt == self.max_retries:
+                    raise
+                delay = min(60.0, 2.0 ** attempt)
+                print(f"🐢 Throttled ({str(e)}), pausing all workers for {delay:.0f}s")
+                self.limiter.pause(delay)
+
+    def _ingest_text(self, text: str):
+        self._process(hash_text(text), analyze_text, text)
+
+    def _ingest_image_url(self, image_url: str):
+        download_result = download_image(image_url)
+        if not (download_result.get("success") and download_result.get("buffer")):
+            print(f"⚠️ Skipping {image_url}: {download_result.get('error')}")
+            self.count("skipped")
+            return
+
+        image_buffer = download_result["buffer"]
+        self._process(hash_image(image_buffer), analyze_image, image_buffer, strict_llm=True)
+
+    def ingest(self, record: dict):
+        text = (record.get("text") or "").strip()
+        image_url = (record.get("imageUrl") or "").strip()
+
+        if len(text) >= 5:
+            self._ingest_text(text)
+        if image_url.startswith(("http://", "https://")):
+            self._ingest_image_url(image_url)
+        if len(text) < 5 and not image_url:
+            self.count("skipped")
+
+        self.count("records")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Pre-analyze a corpus of texts and image URLs.")
+    parser.add_argument("input", help="JSONL or CSV file with text and/or imageUrl fields")
+    parser.add_argument("--concurrency", type=int, default=8, help="Records processed in parallel")
+    parser.add_argument("--rate", type=float, default=300, help="Maximum LLM-bound calls per minute (0 = unlimited)")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries for throttled LLM calls")
+    parser.add_argument("--checkpoint", default=None, help="Checkpoint file (default: <input>.checkpoint.json)")
+    parser.add_argument("--report-every", type=float, default=10, help="Seconds between progress reports")
+    args = parser.parse_args(argv)
+
+    # The server's admission limits are sized for its threads and would shed
+    # our workers; --concurrency and --rate bound the LLM load here instead.
+    llm_admission.disable()
+    checkpoint = _Checkpoint(args.checkpoint or args.input + ".checkpoint.json", os.path.abspath(args.input))
+    ingester = Ingester(args.rate, args.max_retries)
+    concurrency = max(1, args.concurrency)
+
+    started = time.monotonic()
+    last_report = started
+
+    def report(final: bool = False):
+        elapsed = max(time.monotonic() - started, 1e-9)
+        stats = ingester.stats
+        label = "✅ Ingest finished" if final else "📊 Progress"
+        print(
+            f"{label}: {stats['records']} records ({stats['records'] / elapsed:.1f}/s), "
+            f"{stats['analyzed']} analyzed, {stats['cached']} cached, {stats['duplicates']} duplicates, "
+            f"{stats['skipped']} skipped, {stats['failed']} failed"
+        )
+
+    def run(index: int, record: dict):
+        if record is None:
+            # Malformed input line: skip it for good rather than fail every resume
+            ingester.count("skipped")
+            ingester.count("records")
+            checkpoint.mark(index)
+            return
+        try:
+            ingester.ingest(record)
+            checkpoint.mark(index)
+        except Exception as e:
+            print(f"❌ Record {index} failed: {str(e)}")
+            ingester.count("failed")
+
+    in_flight = set()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for index, record in read_records(args.input):
+                if checkpoint.is_done(index):
+                    continue
+                in_flight.add(executor.submit(run, index, record))
+
+                if len(in_flight) >= concurrency * 2:
+                    _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+                if time.monotonic() - last_report >= args.report_every:
+                    checkpoint.save()
+                    report()
+                    last_report = time.monotonic()
+
+            wait(in_flight)
+    except KeyboardInterrupt:
+        print("⏸️ Interrupted; saving checkpoint")
+        checkpoint.save()
+        raise
+
+    checkpoint.save()
+    report(final=True)
+    return 1 if ingester.stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
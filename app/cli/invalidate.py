@@ -0,0 +1,39 @@
+"""
+Invalidate stored analyses so the content is analyzed again next time.
+
+    python -m app.cli.invalidate <sha256> [<sha256> ...] [--reason "wrong verdict"]
+
+Each hash is replaced with a tombstone document. Running servers pick the
+tombstone up from the Cosmos DB change feed and drop the hash from their
+local caches within CHANGE_FEED_POLL_SECONDS; the next submission of that
+content runs the full analysis and overwrites the tombstone.
+"""
+
+import argparse
+import sys
+from app.services.analysis_storage_service import invalidate_analysis
+from app.utils.hashing import is_valid_hash
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Invalidate stored analyses by content hash.")
+    parser.add_argument("hashes", nargs="+", help="SHA-256 hashes of the analyses to invalidate")
+    parser.add_argument("--reason", default=None, help="Recorded on the tombstone document")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    for hash_value in args.hashes:
+        hash_value = hash_value.lower()
+        if not is_valid_hash(hash_value):
+            print(f"⚠️ Skipping {hash_value}: not a hex-encoded SHA-256 digest")
+            failed += 1
+            continue
+        if not invalidate_analysis(hash_value, reason=args.reason).get("success"):
+            failed += 1
+
+    print(f"✅ Invalidated {len(args.hashes) - failed} of {len(args.hashes)} analyses")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Rescore stored image analyses with the current scoring rules.
+
+    python -m app.cli.rescore [--rules rules.json] [--batch-size 5000] [--dry-run]
+
+Stored image analyses keep the raw inputs of the scoring rules (metadata and
+tracing results, the LLM's score, verdict and AI-generation probability), so
+a change to the rules can be replayed over the whole corpus without any LLM
+calls. Documents are streamed out of Cosmos DB, evaluated in columnar batches
+by the vectorized evaluator and only those whose score or verdict changed are
+written back. Each write is conditional on the document's etag, so content
+re-analyzed while the rescore runs keeps its fresh result (reported as a
+conflict).
+
+Text analyses are not touched: their score and verdict come straight from
+the LLM. Final scores are not stored at all; they are computed per request
+with calculate_final_score, so changes to the "final" rules (such as the
+text/image weights) apply as soon as the server reloads its rules.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.services.analysis_storage_service import iter_analyses, update_analysis
+from app.services.scoring_rules import load_scoring_rules, compile_image_rules, normalize_verdict
+from app.config.settings import Config
+
+
+def _to_float(value, default: float) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float(default)
+
+
+def _as_number(value):
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+def _columns(documents: list, rules: dict) -> dict:
+    columns = {
+        "metadataRisk": [],
+        "reusedLikelihood": [],
+        "aiProbability": [],
+        "hasLlm": [],
+        "llmScore": [],
+        "llmVerdict": []
+    }
+    default_llm_score = rules["imageFinal"]["defaultLlmScore"]
+
+    for document in documents:
+        analysis = document["analysis"]
+        llm = analysis.get("llmAnalysis") or {}
+
+        columns["metadataRisk"].append((analysis.get("metadata") or {}).get("metadataRisk") or "")
+        columns["reusedLikelihood"].append((analysis.get("tracing") or {}).get("reusedLikelihood") or "")
+        columns["aiProbability"].append(_to_float(llm.get("aiGeneratedProbability"), 0))
+        columns["hasLlm"].append(bool(llm))
+        columns["llmScore"].append(_to_float(llm.get("credibilityScore"), default_llm_score))
+        columns["llmVerdict"].append(normalize_verdict(llm.get("verdict")))
+
+    return columns
+
+
+def rescore_batch(documents: list, rules: dict, evaluate) -> list:
+    """
+    Rescore a batch of image documents in place and return the changed ones.
+    """
+    results = evaluate(_columns(documents, rules))
+    changed = []
+
+    for i, document in enumerate(documents):
+        analysis = document["analysis"]
+        new_score = _as_number(results["credibilityScore"][i])
+        new_verdict = results["verdict"][i]
+
+        if analysis.get("credibilityScore") == new_score and analysis.get("verdict") == new_verdict:
+            continue
+
+        analysis["credibilityScore"] = new_score
+        analysis["verdict"] = new_verdict
+        changed.append(document)
+
+    return changed
+
+
+def _is_rescorable(document: dict) -> bool:
+    analysis = document.get("analysis")
+    return isinstance(analysis, dict) and analysis.get("status") == "processed"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Rescore stored image analyses with the current scoring rules.")
+    parser.add_argument("--rules", default=Config.SCORING_RULES_PATH, help="JSON rules file merged over the defaults")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Documents evaluated per vectorized batch")
+    parser.add_argument("--write-concurrency", type=int, default=16, help="Parallel upserts for changed documents")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many documents")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args(argv)
+
+    rules = load_scoring_rules(args.rules)
+    evaluate = compile_image_rules(rules)
+
+    started = time.monotonic()
+    seen = 0
+    changed_total = 0
+    conflicts = 0
+    failed = 0
+    batch = []
+
+    def flush(executor):
+        nonlocal changed_total, conflicts, failed
+        if not batch:
+            return
+        changed = rescore_batch(batch, rules, evaluate)
+        changed_total += len(changed)
+        if changed and not args.dry_run:
+            for result in executor.map(update_analysis, changed):
+                if result.get("conflict"):
+                    # Re-analyzed while we were scoring; the new document wins
+                    conflicts += 1
+                elif not result.get("success"):
+                    failed += 1
+        batch.clear()
+
+        elapsed = max(time.monotonic() - started, 1e-9)
+        print(f"📊 {seen} scanned, {changed_total} changed, {conflicts} conflicts, {failed} failed ({seen / elapsed:.0f} docs/s)")
+
+    with ThreadPoolExecutor(max_workers=max(1, args.write_concurrency)) as executor:
+        for document in iter_analyses(data_type="image", page_size=min(args.batch_size, 1000)):
+            if args.limit is not None and seen >= args.limit:
+                break
+            seen += 1
+            if _is_rescorable(document):
+                batch.append(document)
+            if len(batch) >= args.batch_size:
+                flush(executor)
+        flush(executor)
+
+    mode = "would change" if args.dry_run else "changed"
+    print(f"✅ Rescore finished: {seen} scanned, {changed_total} {mode}, {conflicts} conflicts, {failed} failed in {time.monotonic() - started:.1f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,61 @@
-from openai import AzureOpenAI
+import json
 from app.config.settings import Config
 
-_client = None
+def create_azure_client(endpoint: str, api_key: str, api_version: str):
+    # Imported lazily: the openai package is heavy and only needed once an
+    # LLM call (or warmup) actually happens.
+    from openai import AzureOpenAI
+    return AzureOpenAI(
+        azure_endpoint=endpoint,
+        api_key=api_key,
+        api_version=api_version,
+        # LLMRouter owns retries: the SDK's own would sleep through 429s and
+        # 5xx before the router could fail over, hedge or eject the deployment.
+        max_retries=0
+    )
 
-def get_azure_client():
-    global _client
-    if _client is None:
-        if not Config.AZURE_OPENAI_ENDPOINT or not Config.AZURE_OPENAI_API_KEY:
-            raise ValueError("Azure OpenAI configuration missing. Check your .env file.")
-        
-        _client = AzureOpenAI(
-            azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
-            api_key=Config.AZURE_OPENAI_API_KEY,
-            api_version=Config.AZURE_OPENAI_API_VERSION
-        )
-    return _client
+def get_deployment_configs(tier: str = "full") -> list:
+    """
+    Return the pool of Azure OpenAI deployments to route between for a tier.
+    
+    AZURE_OPENAI_DEPLOYMENTS holds a JSON list of objects with name, endpoint,
+    apiKey, deployment and optional apiVersion, weight and tier ("full", the
+    default, or "fast"). Without it the single AZURE_OPENAI_* deployment is
+    the full tier and AZURE_OPENAI_FAST_DEPLOYMENT, if set, is a fast-tier
+    deployment on the same resource.
+    """
+    if Config.AZURE_OPENAI_DEPLOYMENTS:
+        entries = json.loads(Config.AZURE_OPENAI_DEPLOYMENTS)
+    elif Config.AZURE_OPENAI_ENDPOINT and Config.AZURE_OPENAI_API_KEY:
+        entries = [{
+            "name": "default",
+            "endpoint": Config.AZURE_OPENAI_ENDPOINT,
+            "apiKey": Config.AZURE_OPENAI_API_KEY,
+            "deployment": Config.AZURE_OPENAI_DEPLOYMENT
+        }]
+        if Config.AZURE_OPENAI_FAST_DEPLOYMENT:
+            entries.append({
+                "name": "default-fast",
+                "endpoint": Config.AZURE_OPENAI_ENDPOINT,
+                "apiKey": Config.AZURE_OPENAI_API_KEY,
+                "deployment": Config.AZURE_OPENAI_FAST_DEPLOYMENT,
+                "tier": "fast"
+            })
+    else:
+        entries = []
+    
+    deployments = []
+    for index, entry in enumerate(entries):
+        if entry.get("tier", "full") != tier:
+            continue
+        if not entry.get("endpoint") or not entry.get("apiKey") or not entry.get("deployment"):
+            raise ValueError(f"Azure OpenAI deployment #{index} needs endpoint, apiKey and deployment")
+        deployments.append({
+            "name": entry.get("name") or f"deployment-{index}",
+            "endpoint": entry["endpoint"],
+            "apiKey": entry["apiKey"],
+            "deployment": entry["deployment"],
+            "apiVersion": entry.get("apiVersion") or Config.AZURE_OPENAI_API_VERSION,
+            "weight": float(entry.get("weight", 1))
+        })
+    return deployments
@@ -8,9 +8,89 @@ class Config:
     AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_DEPLOYMENT = os.getenv("AZURE_OPENAI_DEPLOYMENT")
     AZURE_OPENAI_API_VERSION = os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21")
+    # Optional JSON list of deployments to balance between (see app/config/azure.py)
+    AZURE_OPENAI_DEPLOYMENTS = os.getenv("AZURE_OPENAI_DEPLOYMENTS")
+    # Optional cheaper deployment tried first by the model cascade
+    AZURE_OPENAI_FAST_DEPLOYMENT = os.getenv("AZURE_OPENAI_FAST_DEPLOYMENT")
     PORT = int(os.getenv("PORT", 5000))
     
     COSMOS_ENDPOINT = os.getenv("COSMOS_ENDPOINT")
     COSMOS_KEY = os.getenv("COSMOS_KEY")
     COSMOS_DATABASE = os.getenv("COSMOS_DATABASE", "trustlensDB")
     COSMOS_CONTAINER = os.getenv("COSMOS_CONTAINER", "analysis_records")
+
+    # CPU-bound image work runs in a process pool. IMAGE_POOL_MODE=inline runs
+    # tasks on the calling thread instead (useful for tests and local debugging).
+    IMAGE_POOL_MODE = os.getenv("IMAGE_POOL_MODE", "process")
+    IMAGE_POOL_WORKERS = int(os.getenv("IMAGE_POOL_WORKERS", os.cpu_count() or 2))
+    IMAGE_POOL_START_METHOD = os.getenv("IMAGE_POOL_START_METHOD", "spawn")
+    IMAGE_TASK_TIMEOUT = float(os.getenv("IMAGE_TASK_TIMEOUT", 10))
+    IMAGE_WORKER_MEMORY_MB = int(os.getenv("IMAGE_WORKER_MEMORY_MB", 1024))
+    IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 50_000_000))
+
+    # Seconds between warmup retries while a required component is down
+    WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", 10))
+
+    # Page URL -> image URL resolution (see app/utils/page_resolvers.py)
+    PAGE_RESOLVE_MAX_DEPTH = int(os.getenv("PAGE_RESOLVE_MAX_DEPTH", 2))
+    PAGE_MAX_REDIRECTS = int(os.getenv("PAGE_MAX_REDIRECTS", 5))
+    PAGE_HEAD_MAX_BYTES = int(os.getenv("PAGE_HEAD_MAX_BYTES", 256 * 1024))
+    PAGE_RESOLVE_TIMEOUT = float(os.getenv("PAGE_RESOLVE_TIMEOUT", 5))
+    PAGE_RESOLVE_CACHE_SIZE = int(os.getenv("PAGE_RESOLVE_CACHE_SIZE", 4096))
+    PAGE_RESOLVE_CACHE_TTL = int(os.getenv("PAGE_RESOLVE_CACHE_TTL", 3600))
+
+    # Optional JSON file overriding the default scoring rules
+    # (see app/services/scoring_rules.py)
+    SCORING_RULES_PATH = os.getenv("SCORING_RULES_PATH")
+
+    # Response compression (see app/utils/compression.py)
+    COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", 1024))
+    GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+    # Largest accepted direct image upload
+    MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+
+    # Admission control for LLM-bound work (see app/services/admission.py)
+    LLM_MAX_CONCURRENT = int(os.getenv("LLM_MAX_CONCURRENT", 4))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", 2))
+    LLM_MAX_WAIT_SECONDS = float(os.getenv("LLM_MAX_WAIT_SECONDS", 15))
+    LLM_EXPECTED_SECONDS = float(os.getenv("LLM_EXPECTED_SECONDS", 5))
+
+    # Routing between Azure OpenAI deployments (see app/services/llm_router.py)
+    LLM_EJECT_AFTER_ERRORS = int(os.getenv("LLM_EJECT_AFTER_ERRORS", 3))
+    LLM_EJECT_SECONDS = float(os.getenv("LLM_EJECT_SECONDS", 30))
+    LLM_THROTTLE_SECONDS = float(os.getenv("LLM_THROTTLE_SECONDS", 10))
+    LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"
+    LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 95))
+    LLM_HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY", 1.0))
+
+    # Model cascade: accept the fast tier's answer only when it is confident
+    # and its score is clear of the verdict thresholds
+    LLM_CASCADE_ENABLED = os.getenv("LLM_CASCADE_ENABLED", "true").lower() == "true"
+    LLM_CASCADE_MIN_CONFIDENCE = float(os.getenv("LLM_CASCADE_MIN_CONFIDENCE", 80))
+    LLM_CASCADE_BORDER_MARGIN = float(os.getenv("LLM_CASCADE_BORDER_MARGIN", 10))
+
+    # Per-request deadline budget (see app/utils/deadline.py). Clients may ask
+    # for a shorter or longer one with X-Request-Deadline-Ms, up to the max.
+    REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", 25))
+    REQUEST_DEADLINE_MAX_SECONDS = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", 60))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", 30))
+    COSMOS_TIMEOUT = float(os.getenv("COSMOS_TIMEOUT", 3))
+
+    # Per-process cache of stored analyses, warmed at startup with the most
+    # recent documents and kept in sync across workers by the Cosmos change feed
+    ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", 20000))
+    ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", 3600))
+    ANALYSIS_CACHE_PRELOAD = int(os.getenv("ANALYSIS_CACHE_PRELOAD", 2000))
+    CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "true").lower() == "true"
+    CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", 2))
+
+    # Animated GIF/WebP: sampled into a contact sheet of distinct keyframes for
+    # a single vision call (see extract_keyframes in app/utils/image_tasks.py)
+    ANIMATION_MAX_KEYFRAMES = int(os.getenv("ANIMATION_MAX_KEYFRAMES", 9))
+    ANIMATION_MAX_SCAN_FRAMES = int(os.getenv("ANIMATION_MAX_SCAN_FRAMES", 300))
+    ANIMATION_DEDUPE_DISTANCE = int(os.getenv("ANIMATION_DEDUPE_DISTANCE", 6))
+    ANIMATION_TILE_SIZE = int(os.getenv("ANIMATION_TILE_SIZE", 384))
+    ANIMATION_FRAME_REUSE_RATIO = float(os.getenv("ANIMATION_FRAME_REUSE_RATIO", 0.6))
+    ANIMATION_FRAME_MATCH_DISTANCE = int(os.getenv("ANIMATION_FRAME_MATCH_DISTANCE", 3))
@@ -6,13 +6,23 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.routes.analyze import analyze_bp
+from app.services.warmup import get_readiness
+from app.utils.compression import init_compression
+from app.utils.json_provider import OrjsonProvider, orjson
 from app.config.settings import Config
 
 def create_app():
     static_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public')
     app = Flask(__name__, static_folder=static_path, static_url_path='')
+    # Enforced while the body streams in, so chunked uploads are bounded too.
+    # The slack leaves room for multipart headers and the text form fields.
+    app.config["MAX_CONTENT_LENGTH"] = Config.MAX_UPLOAD_BYTES + 64 * 1024
+    
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
     
     CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
+    init_compression(app)
     
     @app.route('/')
     def serve_index():
@@ -22,6 +32,11 @@ def create_app():
     def health_check():
         return jsonify({"status": "TrustLens API running"})
     
+    @app.route('/api/ready')
+    def readiness_check():
+        readiness = get_readiness()
+        return jsonify(readiness), 200 if readiness["ready"] else 503
+    
     app.register_blueprint(analyze_bp, url_prefix='/api/analyze')
     
     @app.errorhandler(404)
@@ -43,6 +58,8 @@ def create_app():
 
 
 if __name__ == '__main__':
+    from app.services.warmup import warm_up
     app = create_app()
+    warm_up()
     print(f"🚀 TrustLens backend running on port {Config.PORT}")
     app.run(host='0.0.0.0', port=Config.PORT, debug=True)
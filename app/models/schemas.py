@@ -1,9 +1,14 @@
 from pydantic import BaseModel, field_validator, model_validator
-from typing import Optional
+from typing import List, Optional, Union
+from app.utils.hashing import is_valid_hash
+from app.utils.response_shaping import VIEWS
 
 class AnalyzeRequest(BaseModel):
     text: Optional[str] = None
     imageUrl: Optional[str] = None
+    imageData: Optional[bytes] = None
+    fields: Optional[Union[str, List[str]]] = None
+    view: Optional[str] = None
     
     @field_validator('text')
     @classmethod
@@ -14,8 +19,8 @@ class AnalyzeRequest(BaseModel):
     
     @model_validator(mode='after')
     def validate_at_least_one(self) -> 'AnalyzeRequest':
-        if not self.text and not self.imageUrl:
-            raise ValueError('Either text or imageUrl must be provided')
+        if not self.text and not self.imageUrl and not self.imageData:
+            raise ValueError('Either text, imageUrl or an image upload must be provided')
         return self
     
     @field_validator('imageUrl')
@@ -24,3 +29,27 @@ class AnalyzeRequest(BaseModel):
         if v is not None and not v.startswith(('http://', 'https://')):
             raise ValueError('Image URL must be a valid URL')
         return v
+
+    @field_validator('view')
+    @classmethod
+    def validate_view(cls, v):
+        if v is not None and v not in VIEWS:
+            raise ValueError('View must be "full" or "compact"')
+        return v
+
+
+class HashLookupRequest(BaseModel):
+    hashes: List[str]
+
+    @field_validator('hashes')
+    @classmethod
+    def validate_hashes(cls, v):
+        if not v:
+            raise ValueError('At least one hash must be provided')
+        if len(v) > 100:
+            raise ValueError('At most 100 hashes can be looked up at once')
+        hashes = [h.lower() for h in v]
+        for h in hashes:
+            if not is_valid_hash(h):
+                raise ValueError(f'Invalid SHA-256 hash: {h}')
+        return hashes
@@ -1,23 +1,37 @@
 from flask import Blueprint, request, jsonify
 from pydantic import ValidationError
-from app.models.schemas import AnalyzeRequest
-from app.services.llm_analysis import analyze_text_with_llm, analyze_image_with_llm
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.models.schemas import AnalyzeRequest, HashLookupRequest
 from app.services.scoring import calculate_final_score
-from app.services.image_metadata import analyze_image_metadata
-from app.services.image_tracing import trace_image
-from app.services.image_scoring import calculate_image_credibility
-from app.services.analysis_storage_service import store_analysis, get_analysis_by_hash
-from app.utils.fetch_image import download_image
-from app.utils.hashing import hash_image, hash_text
+from app.services.analysis_pipeline import analyze_text, analyze_image_url, analyze_image_upload, get_cached_result
+from app.services.analysis_storage_service import get_analyses_by_hashes
+from app.services.admission import Overloaded, llm_admission
+from app.utils.deadline import DeadlineExceeded, request_deadline
+from app.utils.hashing import is_valid_hash
+from app.config.settings import Config
+from app.utils.response_shaping import parse_fields, project
 
 analyze_bp = Blueprint('analyze', __name__)
 
-VALID_VERDICTS = ["Reliable", "Questionable", "High Risk"]
 
-def normalize_verdict(verdict: str) -> str:
-    if isinstance(verdict, str) and verdict in VALID_VERDICTS:
-        return verdict
-    return "High Risk"
+def _overloaded_response(error: Overloaded):
+    response = jsonify({
+        "success": False,
+        "message": str(error)
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+def _deadline_seconds() -> float:
+    # Clients may announce how long they will wait; never beyond the server cap
+    header = request.headers.get("X-Request-Deadline-Ms")
+    try:
+        seconds = float(header) / 1000 if header else Config.REQUEST_DEADLINE_SECONDS
+    except ValueError:
+        seconds = Config.REQUEST_DEADLINE_SECONDS
+    return min(max(seconds, 0.0), Config.REQUEST_DEADLINE_MAX_SECONDS)
 
 
 @analyze_bp.route('', methods=['GET'])
@@ -40,8 +54,26 @@ def get_analyze_info():
                 "required": False,
                 "format": "url",
                 "description": "Optional image URL to analyze"
+            },
+            "view": {
+                "type": "string",
+                "required": False,
+                "enum": ["full", "compact"],
+                "description": "Optional response view; compact returns only scores, verdicts and hashes. Also accepted as a query parameter"
+            },
+            "fields": {
+                "type": "string",
+                "required": False,
+                "description": "Optional comma-separated dot paths to return, e.g. finalResult,hash. Also accepted as a query parameter"
             }
         },
+        "deadline": "Optional X-Request-Deadline-Ms header: how long the client will wait. Text analysis past the deadline returns 504; image analysis returns a degraded technical-only result",
+        "imageUpload": "Instead of imageUrl, POST multipart/form-data with the image file in an 'image' field (text, view and fields as form fields)",
+        "hashLookup": {
+            "single": "GET /api/analyze/hash/<sha256>",
+            "multiple": "POST /api/analyze/hash with {\"hashes\": [<sha256>, ...]}",
+            "description": "Return a cached verdict without uploading content. Text hashes are SHA-256 of the trimmed, lowercased UTF-8 text; image hashes are SHA-256 of the exact file bytes"
+        },
         "example": {
             "text": "This is a sample text to analyze for misinformation",
             "imageUrl": "https://example.com/image.jpg"
@@ -54,12 +86,25 @@ def analyze():
     try:
         print("📥 /api/analyze route hit")
         
-        data = request.get_json()
-        if not data:
-            return jsonify({
-                "success": False,
-                "message": "Invalid JSON in request body"
-            }), 400
+        if request.mimetype == 'multipart/form-data':
+            # Direct upload: the browser already has the image bytes, so the
+            # server skips the remote fetch. MAX_CONTENT_LENGTH (see main.py)
+            # bounds the body, chunked uploads included, while it is parsed.
+            data = request.form.to_dict()
+            upload = request.files.get('image')
+            if upload:
+                data["imageData"] = upload.read()
+        else:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data, dict):
+                return jsonify({
+                    "success": False,
+                    "message": "Invalid JSON in request body"
+                }), 400
+            data.pop("imageData", None)
+        
+        data.setdefault("fields", request.args.get("fields"))
+        data.setdefault("view", request.args.get("view"))
         
         try:
             validated_data = AnalyzeRequest(**data)
@@ -69,146 +114,147 @@ def analyze():
                 "message": e.errors()[0]['msg']
             }), 400
         
-        text_analysis = None
-        text_hash = None
-        text_reused = False
-        
-        if validated_data.text:
-            text_hash = hash_text(validated_data.text)
-            existing_text = get_analysis_by_hash(text_hash)
-            
-            if existing_text:
-                print(f"♻️ Reusing cached text analysis for hash: {text_hash[:16]}...")
-                text_analysis = existing_text.get("analysis", {})
-                text_reused = True
-            else:
+        with request_deadline(_deadline_seconds()), llm_admission.request_scope():
+            text_analysis = None
+            text_hash = None
+            text_reused = False
+
+            if validated_data.text:
                 try:
-                    print(f"✍️ Starting LLM Text Analysis...")
-                    llm_result = analyze_text_with_llm(validated_data.text)
-                    print(f"✅ LLM Text Analysis Result: {llm_result}")
-                    
-                    text_analysis = {
-                        "riskLevel": llm_result.get("riskLevel", "medium"),
-                        "riskKeywordsFound": llm_result.get("riskKeywordsFound", []),
-                        "credibilityScore": llm_result.get("credibilityScore", 50),
-                        "verdict": normalize_verdict(llm_result.get("verdict")),
-                        "explanation": llm_result.get("explanation", "")
-                    }
-                    
-                    store_analysis(text_hash, "text", text_analysis)
+                    text_result = analyze_text(validated_data.text)
+                except Overloaded as e:
+                    return _overloaded_response(e)
+                except DeadlineExceeded as e:
+                    print(f"⏱️ Text analysis hit the request deadline: {str(e)}")
+                    return jsonify({
+                        "success": False,
+                        "message": str(e)
+                    }), 504
                 except Exception as e:
                     print(f"❌ Azure OpenAI LLM text analysis failed: {str(e)}")
                     return jsonify({
                         "success": False,
                         "message": f"LLM text analysis failed: {str(e)}"
                     }), 503
-        else:
-            print("📝 No text provided, skipping LLM text analysis")
-            text_analysis = {"status": "skipped"}
-        
-        image_analysis = {"status": "skipped"}
-        image_hash = None
-        image_reused = False
-        
-        if validated_data.imageUrl:
-            try:
-                print(f"🖼️ Fetching image: {validated_data.imageUrl}")
-                download_result = download_image(validated_data.imageUrl)
-                
-                if download_result.get("success") and download_result.get("buffer"):
-                    image_buffer = download_result["buffer"]
-                    
-                    image_hash = hash_image(image_buffer)
-                    existing_image = get_analysis_by_hash(image_hash)
-                    
-                    if existing_image:
-                        print(f"♻️ Reusing cached image analysis for hash: {image_hash[:16]}...")
-                        image_analysis = existing_image.get("analysis", {})
-                        image_analysis["reused"] = True
-                        image_reused = True
+                text_analysis = text_result["analysis"]
+                text_hash = text_result["hash"]
+                text_reused = text_result["reused"]
+            else:
+                print("📝 No text provided, skipping LLM text analysis")
+                text_analysis = {"status": "skipped"}
+
+            image_analysis = {"status": "skipped"}
+            image_hash = None
+            image_reused = False
+
+            if validated_data.imageData or validated_data.imageUrl:
+                try:
+                    if validated_data.imageData:
+                        image_result = analyze_image_upload(validated_data.imageData)
                     else:
-                        metadata = {}
-                        tracing = {}
-                        try:
-                            metadata = analyze_image_metadata(image_buffer)
-                            tracing = trace_image(image_buffer)
-                        except Exception as tech_err:
-                            print(f"⚠️ Technical analysis error: {str(tech_err)}")
-
-                        llm_image_result = {}
-                        try:
-                            print("🎨 Starting LLM Image Analysis...")
-                            llm_image_result = analyze_image_with_llm(image_buffer)
-                            print(f"✅ LLM Image Analysis Result: {llm_image_result}")
-                        except Exception as llm_err:
-                            print(f"❌ LLM image analysis failed: {str(llm_err)}")
-
-                        ai_prob = llm_image_result.get("aiGeneratedProbability", 0)
-                        credibility_result = calculate_image_credibility(metadata, tracing, ai_prob)
-                        
-                        llm_score = llm_image_result.get("credibilityScore", 100)
-                        tech_score = credibility_result["score"]
-                        final_image_score = min(llm_score, tech_score)
-                        
-                        final_image_verdict = normalize_verdict(llm_image_result.get("verdict", credibility_result.get("verdict", "High Risk")))
-                        
-                        if final_image_score < 40:
-                            final_image_verdict = "High Risk"
-                        elif final_image_score < 75:
-                            final_image_verdict = "Questionable"
-
-                        image_analysis = {
-                            "status": "processed",
-                            "metadata": metadata,
-                            "tracing": tracing,
-                            "llmAnalysis": {
-                                "riskLevel": llm_image_result.get("riskLevel", "medium"),
-                                "verdict": normalize_verdict(llm_image_result.get("verdict")),
-                                "credibilityScore": llm_image_result.get("credibilityScore", 50),
-                                "extractedText": llm_image_result.get("extractedText", ""),
-                                "textVerification": llm_image_result.get("textVerification", ""),
-                                "imageContent": llm_image_result.get("imageContent", ""),
-                                "conveyedMessage": llm_image_result.get("conveyedMessage", ""),
-                                "veracityCheck": llm_image_result.get("veracityCheck", ""),
-                                "explanation": llm_image_result.get("explanation", "Image analysis complete."),
-                                "visualRedFlags": llm_image_result.get("visualRedFlags", []),
-                                "aiGeneratedProbability": llm_image_result.get("aiGeneratedProbability", 0)
-                            } if llm_image_result else None,
-                            "credibilityScore": final_image_score,
-                            "verdict": final_image_verdict
-                        }
-                        
-                        store_analysis(image_hash, "image", image_analysis)
-                else:
-                    print(f"⚠️ [Image Analysis] Skipped due to download failure: {download_result.get('error')}")
-                    image_analysis = {"status": "skipped", "error": download_result.get("error")}
-            except Exception as e:
-                print(f"❌ [Image Analysis] Unexpected error: {str(e)}")
-                image_analysis = {"status": "skipped", "error": str(e)}
-        
-        final_result = calculate_final_score(text_analysis, image_analysis)
-        
-        response_data = {
-            "success": True,
-            "textAnalysis": text_analysis,
-            "imageAnalysis": image_analysis,
-            "finalResult": final_result
-        }
-        
-        if text_hash:
-            response_data["hash"] = text_hash
-            response_data["reused"] = text_reused
-        if image_hash:
-            # If both exist, image hash takes precedence for the top-level 'hash' 
-            # or we could keep them separate. The prompt implies a single result structure.
-            response_data["hash"] = image_hash
-            response_data["reused"] = image_reused
-        
-        return jsonify(response_data)
-        
+                        image_result = analyze_image_url(validated_data.imageUrl)
+                    image_analysis = image_result["analysis"]
+                    image_hash = image_result["hash"]
+                    image_reused = image_result["reused"]
+                except Overloaded as e:
+                    return _overloaded_response(e)
+                except DeadlineExceeded as e:
+                    print(f"⏱️ Image analysis hit the request deadline: {str(e)}")
+                    if not validated_data.text:
+                        return jsonify({
+                            "success": False,
+                            "message": str(e)
+                        }), 504
+                    # Keep the finished text analysis rather than failing the request
+                    image_analysis = {"status": "skipped", "error": str(e), "degraded": True}
+                except Exception as e:
+                    print(f"❌ [Image Analysis] Unexpected error: {str(e)}")
+                    image_analysis = {"status": "skipped", "error": str(e)}
+
+            final_result = calculate_final_score(text_analysis, image_analysis)
+
+            response_data = {
+                "success": True,
+                "textAnalysis": text_analysis,
+                "imageAnalysis": image_analysis,
+                "finalResult": final_result
+            }
+
+            if text_hash:
+                response_data["hash"] = text_hash
+                response_data["reused"] = text_reused
+            if image_hash:
+                # If both exist, image hash takes precedence for the top-level 'hash' 
+                # or we could keep them separate. The prompt implies a single result structure.
+                response_data["hash"] = image_hash
+                response_data["reused"] = image_reused
+
+            return jsonify(project(response_data, parse_fields(validated_data.fields, validated_data.view)))
+
+    except RequestEntityTooLarge:
+        return jsonify({
+            "success": False,
+            "message": f"Request body exceeds {Config.MAX_UPLOAD_BYTES} bytes"
+        }), 413
     except Exception as e:
         print(f"❌ Unexpected error: {str(e)}")
         return jsonify({
             "success": False,
             "message": str(e)
         }), 500
+
+
+@analyze_bp.route('/hash/<hash_value>', methods=['GET'])
+def lookup_hash(hash_value):
+    hash_value = hash_value.lower()
+    if not is_valid_hash(hash_value):
+        return jsonify({
+            "success": False,
+            "message": "Hash must be a hex-encoded SHA-256 digest"
+        }), 400
+    
+    result = get_cached_result(hash_value)
+    if not result["found"]:
+        return jsonify({
+            "success": False,
+            "found": False,
+            "hash": hash_value,
+            "message": "No cached analysis for this hash"
+        }), 404
+    
+    response_data = {"success": True, **result}
+    fields = parse_fields(request.args.get("fields"), request.args.get("view"))
+    return jsonify(project(response_data, fields and ["found", "type", *fields]))
+
+
+@analyze_bp.route('/hash', methods=['POST'])
+def lookup_hashes():
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data, dict):
+        return jsonify({
+            "success": False,
+            "message": "Invalid JSON in request body"
+        }), 400
+    
+    try:
+        validated_data = HashLookupRequest(**data)
+    except ValidationError as e:
+        return jsonify({
+            "success": False,
+            "message": e.errors()[0]['msg']
+        }), 400
+    
+    documents = get_analyses_by_hashes(validated_data.hashes)
+    fields = parse_fields(request.args.get("fields"), request.args.get("view"))
+    results = {}
+    for hash_value in validated_data.hashes:
+        result = get_cached_result(hash_value, documents.get(hash_value) or {})
+        if fields and result["found"]:
+            result = project(result, ["found", "hash", "type", *fields])
+            result.pop("success", None)
+        results[hash_value] = result
+    
+    return jsonify({
+        "success": True,
+        "results": results
+    })
@@ -0,0 +1,148 @@
+"""
+Admission control for LLM-bound work.
+
+Cache hits never pass through here: they are answered from storage before
+any LLM work starts, so they form a fast lane that keeps flowing during
+overload. Requests that miss the cache must be admitted first:
+
+    - at most LLM_MAX_CONCURRENT analyses run at once per process
+    - at most LLM_MAX_QUEUE more wait for a slot
+    - a request is rejected straight away when the queue is full or its
+      projected wait (queue position x average service time) exceeds
+      LLM_MAX_WAIT_SECONDS or what is left of the request's deadline
+
+Rejected requests get a 503 with Retry-After instead of waiting until the
+client has given up. Keep LLM_MAX_CONCURRENT + LLM_MAX_QUEUE below the
+worker's thread count so some threads always remain for cache hits.
+
+A request is admitted at most once. The route opens request_scope(); the
+first admit() inside it takes a slot and keeps it until the request ends,
+so a text + image request cannot finish its text analysis and then be shed
+before its image analysis.
+
+The batch CLI tools run their own concurrency and rate limits and call
+disable(), since this controller is sized for the server's thread pool.
+"""
+
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from app.config.settings import Config
+from app.utils.deadline import remaining_time
+
+
+class Overloaded(Exception):
+    """Raised when LLM-bound work is shed instead of queued."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    def __init__(self, max_concurrent: int, max_queue: int, max_wait: float, initial_service_time: float):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self._slots = threading.Semaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self._active = 0
+        self._waiting = 0
+        self._service_time = initial_service_time
+        self._enabled = True
+        self._scope = contextvars.ContextVar(f"admission_scope_{id(self)}", default=None)
+
+    def disable(self):
+        """Let every admit() through immediately (for batch tools with their own limits)."""
+        self._enabled = False
+
+    def _projected_wait(self) -> float:
+        position = self._active + self._waiting + 1 - self.max_concurrent
+        if position <= 0:
+            return 0.0
+        return position * self._service_time / self.max_concurrent
+
+    def _reject(self, reason: str, projected_wait: float):
+        retry_after = max(1, math.ceil(max(projected_wait, self._service_time)))
+        print(f"🚦 Shedding LLM-bound request: {reason}")
+        raise Overloaded(f"Server is overloaded ({reason}); retry later", retry_after)
+
+    @contextmanager
+    def request_scope(self):
+        """Hold any slot taken by admit() inside this block until the block exits."""
+        scope = {"started": None}
+        token = self._scope.set(scope)
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+            if scope["started"] is not None:
+                self._release(scope["started"])
+
+    @contextmanager
+    def admit(self):
+        if not self._enabled:
+            yield
+            return
+
+        scope = self._scope.get()
+        if scope is not None:
+            if scope["started"] is None:
+                self._acquire()
+                scope["started"] = time.monotonic()
+            yield
+            return
+
+        self._acquire()
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(started)
+
+    def _acquire(self):
+        # Never wait for a slot longer than the request itself has left
+        remaining = remaining_time()
+        max_wait = self.max_wait if remaining is None else max(0.0, min(self.max_wait, remaining))
+
+        with self._lock:
+            projected_wait = self._projected_wait()
+            if projected_wait > 0 and self._waiting >= self.max_queue:
+                self._reject("queue full", projected_wait)
+            if projected_wait > max_wait:
+                self._reject(f"projected wait {projected_wait:.1f}s", projected_wait)
+            self._waiting += 1
+
+        acquired = self._slots.acquire(timeout=max_wait)
+        with self._lock:
+            self._waiting -= 1
+            if acquired:
+                self._active += 1
+        if not acquired:
+            self._reject("timed out waiting for a slot", max_wait)
+
+    def _release(self, started: float):
+        elapsed = time.monotonic() - started
+        with self._lock:
+            self._active -= 1
+            # Exponentially weighted average of how long admitted work takes
+            self._service_time = 0.8 * self._service_time + 0.2 * elapsed
+        self._slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "active": self._active,
+                "waiting": self._waiting,
+                "averageServiceTime": round(self._service_time, 3)
+            }
+
+
+llm_admission = AdmissionController(
+    max_concurrent=Config.LLM_MAX_CONCURRENT,
+    max_queue=Config.LLM_MAX_QUEUE,
+    max_wait=Config.LLM_MAX_WAIT_SECONDS,
+    initial_service_time=Config.LLM_EXPECTED_SECONDS
+)
@@ -0,0 +1,288 @@
+"""
+The analysis pipeline shared by the HTTP route and the command-line tools.
+
+Each entry point hashes the content, reuses a stored analysis when the hash
+has been seen before, and otherwise runs the LLM and technical analysis and
+stores the result. They return a dict with the analysis, its hash and
+whether it was reused from storage.
+
+Cache hits are answered before any LLM work; everything after a miss runs
+under admission control and may raise Overloaded (see admission.py). Inside
+a request deadline (see app/utils/deadline.py) text analysis raises
+DeadlineExceeded once the budget is gone, while image analysis degrades to
+the technical score and does not store that partial result.
+
+Animated GIF/WebP images are sampled into a contact sheet of distinct
+keyframes (see extract_keyframes) so they cost one bounded vision call, and
+their keyframe hashes are stored so a re-cut of the same animation reuses
+the analysis.
+"""
+
+from app.config.settings import Config
+from app.services.llm_analysis import analyze_text_with_llm, analyze_image_with_llm, detect_image_mime_type
+from app.services.image_metadata import analyze_image_metadata
+from app.services.image_tracing import trace_image
+from app.services.image_scoring import calculate_image_credibility, calculate_final_image_result
+from app.services.analysis_storage_service import (
+    store_analysis,
+    get_analysis_by_hash,
+    store_frame_hashes,
+    find_analysis_by_frames
+)
+from app.services.admission import llm_admission
+from app.services.scoring import calculate_final_score
+from app.services.scoring_rules import normalize_verdict
+from app.utils.deadline import DeadlineExceeded, deadline_expired
+from app.utils.fetch_image import download_image
+from app.utils.hashing import hash_image, hash_text
+from app.utils.image_pool import run_image_task
+from app.utils.image_tasks import verify_image, extract_keyframes
+
+
+def analyze_text(text: str, check_cache: bool = True) -> dict:
+    """
+    Analyze text, reusing a stored analysis for the same normalized text.
+
+    Raises if the LLM analysis fails; text has no non-LLM fallback. Callers
+    that have just looked the hash up themselves pass check_cache=False.
+    """
+    text_hash = hash_text(text)
+    existing_text = get_analysis_by_hash(text_hash) if check_cache else None
+
+    if existing_text:
+        print(f"♻️ Reusing cached text analysis for hash: {text_hash[:16]}...")
+        return {
+            "analysis": existing_text.get("analysis", {}),
+            "hash": text_hash,
+            "reused": True
+        }
+
+    try:
+        with llm_admission.admit():
+            print(f"✍️ Starting LLM Text Analysis...")
+            llm_result = analyze_text_with_llm(text)
+            print(f"✅ LLM Text Analysis Result: {llm_result}")
+    except Exception as e:
+        if deadline_expired() and not isinstance(e, DeadlineExceeded):
+            raise DeadlineExceeded("Request deadline exceeded during text analysis") from e
+        raise
+
+    text_analysis = {
+        "riskLevel": llm_result.get("riskLevel", "medium"),
+        "riskKeywordsFound": llm_result.get("riskKeywordsFound", []),
+        "credibilityScore": llm_result.get("credibilityScore", 50),
+        "verdict": normalize_verdict(llm_result.get("verdict")),
+        "explanation": llm_result.get("explanation", ""),
+        "modelTier": llm_result.get("modelTier")
+    }
+
+    store_analysis(text_hash, "text", text_analysis)
+    return {
+        "analysis": text_analysis,
+        "hash": text_hash,
+        "reused": False
+    }
+
+
+def _sample_animation(image_buffer: bytes) -> dict:
+    """Keyframes of an animated GIF/WebP, or None for still images."""
+    if detect_image_mime_type(image_buffer) not in ("image/gif", "image/webp"):
+        return None
+    try:
+        animation = run_image_task(extract_keyframes, image_buffer)
+    except Exception as e:
+        print(f"⚠️ Keyframe extraction failed, analyzing as a still image: {str(e)}")
+        return None
+    if not animation.get("animated"):
+        return None
+    print(
+        f"🎞️ Sampled {len(animation['keyframes'])} keyframes from {animation['distinctFrames']} distinct "
+        f"of {animation['framesScanned']} frames"
+    )
+    return animation
+
+
+def analyze_image(image_buffer: bytes, strict_llm: bool = False, check_cache: bool = True) -> dict:
+    """
+    Analyze downloaded image bytes, reusing a stored analysis for the same bytes.
+
+    By default a failed LLM call degrades to the technical score. With
+    strict_llm the failure is raised instead and nothing is stored, which
+    lets batch callers back off and retry rather than persist a degraded
+    result. check_cache=False skips the stored-analysis lookup for callers
+    that have just done it themselves.
+    """
+    image_hash = hash_image(image_buffer)
+    existing_image = get_analysis_by_hash(image_hash) if check_cache else None
+
+    if existing_image:
+        print(f"♻️ Reusing cached image analysis for hash: {image_hash[:16]}...")
+        # Copy: the stored document may be shared through the local cache
+        image_analysis = {**existing_image.get("analysis", {}), "reused": True}
+        return {
+            "analysis": image_analysis,
+            "hash": image_hash,
+            "reused": True
+        }
+
+    animation = _sample_animation(image_buffer)
+    if animation:
+        frame_hashes = animation["frameHashes"]
+        matched = find_analysis_by_frames(frame_hashes, Config.ANIMATION_FRAME_REUSE_RATIO)
+        if matched:
+            print(f"♻️ Reusing frame-matched analysis for hash: {image_hash[:16]}...")
+            # Store under these exact bytes too, so the next submission is a direct hit
+            store_analysis(image_hash, "image", matched.get("analysis", {}))
+            return {
+                "analysis": {**matched.get("analysis", {}), "reused": True},
+                "hash": image_hash,
+                "reused": True
+            }
+
+    metadata = {}
+    tracing = {}
+    try:
+        metadata = analyze_image_metadata(image_buffer)
+        tracing = trace_image(image_buffer)
+    except Exception as tech_err:
+        print(f"⚠️ Technical analysis error: {str(tech_err)}")
+
+    llm_image_result = {}
+    degraded = False
+    if deadline_expired():
+        print("⏱️ Request deadline reached, skipping LLM image analysis")
+        degraded = True
+    else:
+        with llm_admission.admit():
+            try:
+                print("🎨 Starting LLM Image Analysis...")
+                if animation:
+                    llm_image_result = analyze_image_with_llm(animation["contactSheet"], animation=animation)
+                else:
+                    llm_image_result = analyze_image_with_llm(image_buffer)
+                print(f"✅ LLM Image Analysis Result: {llm_image_result}")
+            except Exception as llm_err:
+                print(f"❌ LLM image analysis failed: {str(llm_err)}")
+                if strict_llm:
+                    raise
+                degraded = deadline_expired()
+
+    ai_prob = llm_image_result.get("aiGeneratedProbability", 0)
+    credibility_result = calculate_image_credibility(metadata, tracing, ai_prob)
+    final_image_result = calculate_final_image_result(llm_image_result, credibility_result)
+
+    image_analysis = {
+        "status": "processed",
+        "metadata": metadata,
+        "tracing": tracing,
+        "llmAnalysis": {
+            "riskLevel": llm_image_result.get("riskLevel", "medium"),
+            "verdict": normalize_verdict(llm_image_result.get("verdict")),
+            "credibilityScore": llm_image_result.get("credibilityScore", 50),
+            "extractedText": llm_image_result.get("extractedText", ""),
+            "textVerification": llm_image_result.get("textVerification", ""),
+            "imageContent": llm_image_result.get("imageContent", ""),
+            "conveyedMessage": llm_image_result.get("conveyedMessage", ""),
+            "veracityCheck": llm_image_result.get("veracityCheck", ""),
+            "explanation": llm_image_result.get("explanation", "Image analysis complete."),
+            "visualRedFlags": llm_image_result.get("visualRedFlags", []),
+            "aiGeneratedProbability": llm_image_result.get("aiGeneratedProbability", 0),
+            "modelTier": llm_image_result.get("modelTier")
+        } if llm_image_result else None,
+        "credibilityScore": final_image_result["credibilityScore"],
+        "verdict": final_image_result["verdict"]
+    }
+
+    if animation:
+        image_analysis["animation"] = {
+            "framesScanned": animation["framesScanned"],
+            "distinctFrames": animation["distinctFrames"],
+            "keyframes": [frame["index"] for frame in animation["keyframes"]],
+            "grid": f"{animation['columns']}x{animation['rows']}"
+        }
+
+    if degraded:
+        # Cut short by the deadline: answer with what we have, but do not
+        # cache it in place of a full analysis.
+        image_analysis["degraded"] = True
+    else:
+        store_analysis(image_hash, "image", image_analysis)
+        if animation and llm_image_result:
+            store_frame_hashes(frame_hashes, image_hash)
+    return {
+        "analysis": image_analysis,
+        "hash": image_hash,
+        "reused": False
+    }
+
+
+def analyze_image_url(image_url: str, strict_llm: bool = False) -> dict:
+    """
+    Download an image (resolving page URLs) and analyze it.
+
+    A failed download is not an error: the analysis comes back as skipped
+    with the download error attached and no hash. Running out of request
+    deadline while downloading raises DeadlineExceeded.
+    """
+    print(f"🖼️ Fetching image: {image_url}")
+    download_result = download_image(image_url)
+
+    if download_result.get("success") and download_result.get("buffer"):
+        return analyze_image(download_result["buffer"], strict_llm=strict_llm)
+
+    print(f"⚠️ [Image Analysis] Skipped due to download failure: {download_result.get('error')}")
+    return {
+        "analysis": {"status": "skipped", "error": download_result.get("error")},
+        "hash": None,
+        "reused": False
+    }
+
+
+def analyze_image_upload(image_bytes: bytes) -> dict:
+    """
+    Analyze image bytes uploaded by the client instead of an imageUrl.
+
+    The bytes are verified the same way as downloaded images; invalid data
+    comes back as a skipped analysis.
+    """
+    try:
+        run_image_task(verify_image, image_bytes)
+    except Exception as img_err:
+        if isinstance(img_err, DeadlineExceeded) or deadline_expired():
+            raise DeadlineExceeded("Request deadline exceeded while verifying image") from img_err
+        error = f"Uploaded data is not a valid image: {str(img_err)}"
+        print(f"⚠️ [Image Analysis] Skipped: {error}")
+        return {
+            "analysis": {"status": "skipped", "error": error},
+            "hash": None,
+            "reused": False
+        }
+
+    return analyze_image(image_bytes)
+
+
+def get_cached_result(hash_value: str, document: dict = None) -> dict:
+    """
+    Describe the stored analysis for a hash without running any analysis.
+
+    finalResult is what /api/analyze would return for that content alone.
+    Pass document when it has already been fetched.
+    """
+    if document is None:
+        document = get_analysis_by_hash(hash_value)
+    if not document:
+        return {"found": False, "hash": hash_value}
+
+    analysis = document.get("analysis", {})
+    if document.get("type") == "image":
+        final_result = calculate_final_score({"status": "skipped"}, analysis)
+    else:
+        final_result = calculate_final_score(analysis, {"status": "skipped"})
+
+    return {
+        "found": True,
+        "hash": hash_value,
+        "type": document.get("type"),
+        "analysis": analysis,
+        "finalResult": final_result
+    }
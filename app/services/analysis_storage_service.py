@@ -9,16 +9,39 @@ This service stores analysis results in Azure Cosmos DB using cryptographic hash
     - By using cryptographic hashes (SHA-256), we can detect duplicates without knowing the original content.
     - We do not infer location, authorship, or personally identifiable information, adhering to Imagine Cup ethical standards.
 
+    Local cache & change feed:
+    - Every process keeps recently stored and read analyses in memory, so repeat
+      lookups of popular content never leave the process.
+    - At startup the cache is preloaded with the most recently stored analyses,
+      and a background thread follows the container's change feed, so an analysis
+      stored by any worker on any node becomes a local hit everywhere within
+      CHANGE_FEED_POLL_SECONDS.
+    - The change feed does not report deletes, so invalidate_analysis() replaces
+      a document with a tombstone ({"invalidated": true}). Tombstones travel
+      through the feed like any other write and evict the hash from every cache;
+      lookups treat them as misses.
+    - Frame band documents (the animation frame index) live in the same
+      container but never enter the local cache or the startup preload.
+
 """
 
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from azure.cosmos import CosmosClient, PartitionKey, exceptions
 from app.config.settings import Config
+from app.utils.deadline import DeadlineExceeded, stage_timeout
+from app.utils.ttl_cache import TTLCache
 
 
 _cosmos_client = None
 _container = None
 
+_local_cache = TTLCache(Config.ANALYSIS_CACHE_SIZE, Config.ANALYSIS_CACHE_TTL)
+_feed_lock = threading.Lock()
+_feed_pid = None
+
 
 def _get_container():
     """
@@ -35,7 +58,14 @@ def _get_container():
         return None
     
     try:
-        _cosmos_client = CosmosClient(Config.COSMOS_ENDPOINT, Config.COSMOS_KEY)
+        # azure.cosmos is imported lazily to keep module import (and the
+        # preloaded gunicorn master) light.
+        from azure.cosmos import CosmosClient, PartitionKey
+        _cosmos_client = CosmosClient(
+            Config.COSMOS_ENDPOINT,
+            Config.COSMOS_KEY,
+            connection_timeout=Config.COSMOS_TIMEOUT
+        )
         
         database = _cosmos_client.create_database_if_not_exists(id=Config.COSMOS_DATABASE)
         
@@ -51,6 +81,24 @@ def _get_container():
         return None
 
 
+_FRAME_BAND_TYPE = "frameband"
+
+
+def _is_invalidated(document: dict) -> bool:
+    return bool(document.get("invalidated"))
+
+
+def _cache_document(document: dict):
+    if document.get("type") == _FRAME_BAND_TYPE:
+        # Frame band documents share the container but are rewritten with
+        # every animated analysis; caching them would evict real analyses.
+        return
+    if _is_invalidated(document):
+        _local_cache.pop(document.get("id"))
+    else:
+        _local_cache.set(document["id"], document)
+
+
 def store_analysis(hash_value: str, data_type: str, analysis_result: dict) -> dict:
     """
     Store an analysis result in Cosmos DB.
@@ -70,6 +118,8 @@ def store_analysis(hash_value: str, data_type: str, analysis_result: dict) -> di
     if container is None:
         return {"success": False, "error": "Cosmos DB not configured"}
     
+    from azure.cosmos import exceptions
+    
     document = {
         "id": hash_value,
         "hash": hash_value,
@@ -79,7 +129,8 @@ def store_analysis(hash_value: str, data_type: str, analysis_result: dict) -> di
     }
     
     try:
-        container.upsert_item(document)
+        container.upsert_item(document, timeout=Config.COSMOS_TIMEOUT)
+        _cache_document(document)
         print(f"✅ Stored analysis for hash: {hash_value[:16]}...")
         return {"success": True, "document": document}
     except exceptions.CosmosHttpResponseError as e:
@@ -98,18 +149,444 @@ def get_analysis_by_hash(hash_value: str) -> dict:
         The stored document if found, None otherwise
     
     This enables efficient deduplication: if we've seen this content before,
-    we return the cached analysis instead of re-processing.
+    we return the cached analysis instead of re-processing. The local cache
+    is checked first; invalidated documents count as not found.
     """
+    cached = _local_cache.get(hash_value)
+    if cached is not None:
+        print(f"⚡ Found cached analysis in memory for hash: {hash_value[:16]}...")
+        return cached
+    
     container = _get_container()
     if container is None:
         return None
     
+    from azure.cosmos import exceptions
+    
     try:
-        item = container.read_item(item=hash_value, partition_key=hash_value)
+        item = container.read_item(
+            item=hash_value,
+            partition_key=hash_value,
+            timeout=stage_timeout(Config.COSMOS_TIMEOUT, "storage lookup")
+        )
+        if _is_invalidated(item):
+            return None
+        _cache_document(item)
         print(f"✅ Found existing analysis for hash: {hash_value[:16]}...")
         return item
     except exceptions.CosmosResourceNotFoundError:
         return None
+    except (DeadlineExceeded, exceptions.CosmosClientTimeoutError) as e:
+        # A slow cache lookup is treated as a miss rather than failing the request
+        print(f"⚠️ Analysis lookup timed out: {str(e)}")
+        return None
     except exceptions.CosmosHttpResponseError as e:
         print(f"⚠️ Error retrieving analysis: {str(e)}")
         return None
+
+
+def warm_up_storage() -> bool:
+    """
+    Create the Cosmos client and container handle ahead of traffic.
+
+    Reading the container properties also opens the data-plane connection
+    pool, so the first real lookup does not pay for the TLS handshake.
+    """
+    container = _get_container()
+    if container is None:
+        return False
+    container.read()
+    return True
+
+
+def get_analyses_by_hashes(hash_values: list) -> dict:
+    """
+    Retrieve several stored analyses in one query.
+    
+    Returns a dict mapping each found hash to its document; hashes without a
+    stored analysis are simply absent. Only hashes missing from the local
+    cache are queried.
+    """
+    found = {}
+    missing = []
+    for hash_value in hash_values:
+        cached = _local_cache.get(hash_value)
+        if cached is not None:
+            found[hash_value] = cached
+        else:
+            missing.append(hash_value)
+    
+    container = _get_container()
+    if container is None or not missing:
+        return found
+    
+    from azure.cosmos import exceptions
+    
+    try:
+        # An IN list on the partition key lets Cosmos DB route the query to
+        # just the partitions holding these hashes instead of all of them.
+        names = [f"@h{i}" for i in range(len(missing))]
+        items = container.query_items(
+            query=f"SELECT * FROM c WHERE c.hash IN ({', '.join(names)}) AND NOT IS_DEFINED(c.invalidated)",
+            parameters=[{"name": name, "value": value} for name, value in zip(names, missing)],
+            enable_cross_partition_query=True,
+            timeout=stage_timeout(Config.COSMOS_TIMEOUT, "storage lookup")
+        )
+        for item in items:
+            _cache_document(item)
+            found[item["id"]] = item
+    except (DeadlineExceeded, exceptions.CosmosClientTimeoutError) as e:
+        print(f"⚠️ Analyses lookup timed out: {str(e)}")
+    except exceptions.CosmosHttpResponseError as e:
+        print(f"⚠️ Error retrieving analyses: {str(e)}")
+    return found
+
+
+def iter_analyses(data_type: str = None, page_size: int = 1000):
+    """
+    Stream stored analysis documents, optionally only those of one type.
+    Invalidated documents are skipped.
+
+    Documents are fetched page by page across partitions, so arbitrarily
+    large containers can be walked without holding them in memory.
+    """
+    container = _get_container()
+    if container is None:
+        return
+    
+    query = "SELECT * FROM c WHERE NOT IS_DEFINED(c.invalidated)"
+    parameters = []
+    if data_type:
+        query += " AND c.type = @type"
+        parameters.append({"name": "@type", "value": data_type})
+    
+    yield from container.query_items(
+        query=query,
+        parameters=parameters,
+        enable_cross_partition_query=True,
+        max_item_count=page_size
+    )
+
+
+def update_analysis(document: dict) -> dict:
+    """
+    Write back an existing analysis document after it has been modified.
+    
+    Unlike store_analysis this keeps the original createdAt and stamps
+    updatedAt instead. Documents read from Cosmos DB carry an _etag; the
+    write only succeeds if the stored document has not changed since, so a
+    fresh analysis stored in the meantime is never overwritten. Such
+    conflicts come back as {"success": False, "conflict": True}.
+    """
+    container = _get_container()
+    if container is None:
+        return {"success": False, "error": "Cosmos DB not configured"}
+    
+    from azure.core import MatchConditions
+    from azure.cosmos import exceptions
+    
+    etag = document.get("_etag")
+    document = {key: value for key, value in document.items() if not key.startswith("_")}
+    document["updatedAt"] = datetime.now(timezone.utc).isoformat()
+    
+    try:
+        if etag:
+            container.replace_item(
+                item=document["id"],
+                body=document,
+                etag=etag,
+                match_condition=MatchConditions.IfNotModified,
+                timeout=Config.COSMOS_TIMEOUT
+            )
+        else:
+            container.upsert_item(document, timeout=Config.COSMOS_TIMEOUT)
+        _cache_document(document)
+        return {"success": True, "document": document}
+    except (exceptions.CosmosAccessConditionFailedError, exceptions.CosmosResourceNotFoundError):
+        print(f"⚠️ Analysis {document.get('id', '')[:16]}... changed since it was read; not updated")
+        return {"success": False, "conflict": True}
+    except exceptions.CosmosHttpResponseError as e:
+        print(f"❌ Failed to update analysis {document.get('id', '')[:16]}...: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+# Frame index: each 64-bit frame hash is filed under its four 16-bit bands.
+# Two hashes within 3 bits of each other share at least one band exactly, so
+# near-duplicate frames (re-encoded, resized) are found by point lookups.
+_FRAME_BANDS = 4
+_FRAME_BAND_BITS = 16
+_MAX_FRAMES_PER_BAND = 500
+_MAX_ANALYSES_PER_FRAME = 20
+_FRAME_WRITE_ATTEMPTS = 3
+
+_frame_executor = None
+_frame_executor_lock = threading.Lock()
+
+
+def _frame_band_ids(frame_hash: str) -> list:
+    value = int(frame_hash, 16)
+    mask = (1 << _FRAME_BAND_BITS) - 1
+    return [
+        f"frameband-{band}-{(value >> (band * _FRAME_BAND_BITS)) & mask:04x}"
+        for band in range(_FRAME_BANDS)
+    ]
+
+
+def _is_indexable_frame(frame_hash: str) -> bool:
+    # Flat frames (all black, all white) hash to zero and would match anything
+    return int(frame_hash, 16) != 0
+
+
+def _add_frames(document: dict, frame_hashes: list, analysis_hash: str) -> bool:
+    """Add analysis_hash to each frame's set in a band document; True if it changed."""
+    frames = document.setdefault("frames", {})
+    changed = False
+    for frame_hash in frame_hashes:
+        analyses = frames.get(frame_hash)
+        if analyses is None:
+            if len(frames) >= _MAX_FRAMES_PER_BAND:
+                continue
+            analyses = frames[frame_hash] = []
+        if analysis_hash in analyses:
+            continue
+        analyses.append(analysis_hash)
+        # Oldest analyses drop out first
+        del analyses[:-_MAX_ANALYSES_PER_FRAME]
+        changed = True
+    return changed
+
+
+def _write_frame_band(container, band_id: str, frame_hashes: list, analysis_hash: str) -> bool:
+    from azure.core import MatchConditions
+    from azure.cosmos import exceptions
+    
+    for _ in range(_FRAME_WRITE_ATTEMPTS):
+        try:
+            try:
+                document = container.read_item(item=band_id, partition_key=band_id, timeout=Config.COSMOS_TIMEOUT)
+            except exceptions.CosmosResourceNotFoundError:
+                document = {"id": band_id, "hash": band_id, "type": _FRAME_BAND_TYPE, "frames": {}}
+            if not _add_frames(document, frame_hashes, analysis_hash):
+                return True
+            document["updatedAt"] = datetime.now(timezone.utc).isoformat()
+            if "_etag" in document:
+                container.replace_item(
+                    item=band_id,
+                    body=document,
+                    etag=document["_etag"],
+                    match_condition=MatchConditions.IfNotModified,
+                    timeout=Config.COSMOS_TIMEOUT
+                )
+            else:
+                container.create_item(document, timeout=Config.COSMOS_TIMEOUT)
+            return True
+        except (exceptions.CosmosAccessConditionFailedError, exceptions.CosmosResourceExistsError):
+            # Another writer got there first; merge into its version
+            continue
+        except exceptions.CosmosHttpResponseError as e:
+            print(f"⚠️ Failed to store frame band {band_id}: {str(e)}")
+            return False
+    print(f"⚠️ Gave up storing frame band {band_id} after {_FRAME_WRITE_ATTEMPTS} conflicting writes")
+    return False
+
+
+def _index_frames(container, frame_hashes: list, analysis_hash: str):
+    bands = {}
+    for frame_hash in frame_hashes:
+        for band_id in _frame_band_ids(frame_hash):
+            bands.setdefault(band_id, []).append(frame_hash)
+    stored = sum(
+        _write_frame_band(container, band_id, band_frames, analysis_hash)
+        for band_id, band_frames in bands.items()
+    )
+    print(f"🎞️ Indexed {len(frame_hashes)} frames ({stored}/{len(bands)} bands) for analysis {analysis_hash[:16]}...")
+
+
+def store_frame_hashes(frame_hashes: list, analysis_hash: str) -> int:
+    """
+    Record which analysis the frames of an animated image belong to.
+    
+    Every distinct frame is filed under the four bands of its 64-bit
+    perceptual hash; band documents map each frame hash to the set of
+    analyses it appeared in, merged with etag-checked writes. Frame documents
+    hold no content, only hashes. Writing up to four documents per frame is
+    left to a background thread so the request does not wait on it.
+    
+    Returns the number of frames queued for indexing.
+    """
+    global _frame_executor
+    
+    container = _get_container()
+    if container is None:
+        return 0
+    
+    frame_hashes = sorted(set(filter(_is_indexable_frame, frame_hashes)))
+    if not frame_hashes:
+        return 0
+    
+    with _frame_executor_lock:
+        if _frame_executor is None:
+            _frame_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="frame-index")
+    _frame_executor.submit(_index_frames, container, frame_hashes, analysis_hash)
+    return len(frame_hashes)
+
+
+def _frame_distance(left: str, right: str) -> int:
+    return bin(int(left, 16) ^ int(right, 16)).count("1")
+
+
+def find_analysis_by_frames(frame_hashes: list, min_ratio: float, max_distance: int = None) -> dict:
+    """
+    Find a stored analysis that shares most frames with an animation.
+    
+    A frame matches an analysis when a stored frame of that analysis is
+    within max_distance bits of it. Returns the analysis document when at
+    least min_ratio of the animation's distinct frames match the same
+    analysis, None otherwise.
+    """
+    max_distance = Config.ANIMATION_FRAME_MATCH_DISTANCE if max_distance is None else max_distance
+    frame_hashes = sorted(set(filter(_is_indexable_frame, frame_hashes)))
+    if not frame_hashes:
+        return None
+    
+    band_ids = sorted({band_id for frame_hash in frame_hashes for band_id in _frame_band_ids(frame_hash)})
+    documents = {}
+    # Keep each IN query to a modest parameter list
+    for offset in range(0, len(band_ids), 100):
+        documents.update(get_analyses_by_hashes(band_ids[offset:offset + 100]))
+    
+    votes = {}
+    for frame_hash in frame_hashes:
+        matched = set()
+        for band_id in _frame_band_ids(frame_hash):
+            stored_frames = documents.get(band_id, {}).get("frames", {})
+            for stored_hash, analyses in stored_frames.items():
+                if _frame_distance(frame_hash, stored_hash) <= max_distance:
+                    matched.update(analyses)
+        for analysis_hash in matched:
+            votes[analysis_hash] = votes.get(analysis_hash, 0) + 1
+    
+    for analysis_hash, matches in sorted(votes.items(), key=lambda vote: vote[1], reverse=True):
+        if matches / len(frame_hashes) < min_ratio:
+            break
+        # Invalidated analyses drop out here and the next best is tried
+        analysis = get_analysis_by_hash(analysis_hash)
+        if analysis:
+            print(f"🎞️ {matches}/{len(frame_hashes)} frames match analysis {analysis_hash[:16]}...")
+            return analysis
+    return None
+
+
+def invalidate_analysis(hash_value: str, reason: str = None) -> dict:
+    """
+    Replace a stored analysis with a tombstone so it is recomputed.
+    
+    The tombstone reaches every process through the change feed and evicts
+    the hash from its local cache; the next submission of the content is
+    analyzed afresh and its result overwrites the tombstone.
+    """
+    container = _get_container()
+    if container is None:
+        return {"success": False, "error": "Cosmos DB not configured"}
+    
+    from azure.cosmos import exceptions
+    
+    document = {
+        "id": hash_value,
+        "hash": hash_value,
+        "invalidated": True,
+        "reason": reason,
+        "invalidatedAt": datetime.now(timezone.utc).isoformat()
+    }
+    
+    try:
+        container.upsert_item(document, timeout=Config.COSMOS_TIMEOUT)
+        _cache_document(document)
+        print(f"🗑️ Invalidated analysis for hash: {hash_value[:16]}...")
+        return {"success": True, "document": document}
+    except exceptions.CosmosHttpResponseError as e:
+        print(f"❌ Failed to invalidate analysis {hash_value[:16]}...: {str(e)}")
+        return {"success": False, "error": str(e)}
+
+
+def preload_recent_analyses(limit: int) -> int:
+    """
+    Fill the local cache with the most recently stored analyses.
+    
+    Returns the number of documents loaded, or None when storage is not
+    configured.
+    """
+    container = _get_container()
+    if container is None:
+        return None
+    if limit <= 0:
+        return 0
+    
+    items = list(container.query_items(
+        query=(
+            "SELECT TOP @limit * FROM c WHERE NOT IS_DEFINED(c.invalidated) "
+            "AND c.type != @frameBand ORDER BY c._ts DESC"
+        ),
+        parameters=[{"name": "@limit", "value": limit}, {"name": "@frameBand", "value": _FRAME_BAND_TYPE}],
+        enable_cross_partition_query=True
+    ))
+    # Oldest first, so the newest documents end up most recently used
+    for item in reversed(items):
+        _cache_document(item)
+    return len(items)
+
+
+def _follow_change_feed(container, start_time: datetime):
+    continuation = None
+    while True:
+        try:
+            if continuation:
+                feed = container.query_items_change_feed(continuation=continuation)
+            else:
+                feed = container.query_items_change_feed(start_time=start_time)
+            pages = feed.by_page()
+            changed = 0
+            for page in pages:
+                for document in page:
+                    if document.get("type") == _FRAME_BAND_TYPE:
+                        continue
+                    _cache_document(document)
+                    changed += 1
+            continuation = pages.continuation_token or continuation
+            if changed:
+                print(f"🔄 Change feed applied {changed} analyses to the local cache")
+        except Exception as e:
+            print(f"⚠️ Change feed read failed: {str(e)}")
+        time.sleep(Config.CHANGE_FEED_POLL_SECONDS)
+
+
+def start_change_feed() -> bool:
+    """
+    Start following the container's change feed in a background thread.
+    
+    Call it before preload_recent_analyses so that nothing written during the
+    preload is missed. Safe to call more than once; each process (gunicorn
+    worker) runs a single follower of its own.
+    """
+    global _feed_pid
+    
+    if not Config.CHANGE_FEED_ENABLED:
+        return False
+    container = _get_container()
+    if container is None:
+        return False
+    
+    with _feed_lock:
+        if _feed_pid == os.getpid():
+            return True
+        start_time = datetime.now(timezone.utc)
+        thread = threading.Thread(
+            target=_follow_change_feed,
+            args=(container, start_time),
+            name="analysis-change-feed",
+            daemon=True
+        )
+        thread.start()
+        _feed_pid = os.getpid()
+    print(f"🔄 Following Cosmos DB change feed every {Config.CHANGE_FEED_POLL_SECONDS:g}s")
+    return True
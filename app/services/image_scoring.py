@@ -1,39 +1,52 @@
+from app.services.scoring_rules import get_scoring_rules, apply_bands, normalize_verdict
+
+
 def calculate_image_credibility(metadata: dict, tracing: dict, ai_prob: int = 0) -> dict:
-    score = 100
+    rules = get_scoring_rules()["image"]
+    score = rules["baseScore"]
     
     # Metadata risks
     if metadata and metadata.get("metadataRisk"):
-        if metadata["metadataRisk"] == "medium":
-            score -= 20
-        elif metadata["metadataRisk"] == "high":
-            score -= 40
+        score -= rules["penalties"]["metadataRisk"].get(metadata["metadataRisk"], 0)
     
     # Tracing/Reuse risks
     if tracing and tracing.get("reusedLikelihood"):
-        if tracing["reusedLikelihood"] == "medium":
-            score -= 20
-        elif tracing["reusedLikelihood"] == "high":
-            score -= 40
+        score -= rules["penalties"]["reusedLikelihood"].get(tracing["reusedLikelihood"], 0)
 
-    # AI Generation risks (New)
+    # AI Generation risks: first matching rule wins
     if ai_prob > 0:
-        if ai_prob >= 80:
-            score = min(score, 20) # High probability of AI = very low score
-        elif ai_prob >= 50:
-            score = min(score, 50) # Medium probability
-        elif ai_prob >= 20:
-            score -= 15
+        for rule in rules["aiProbability"]:
+            if ai_prob >= rule["min"]:
+                if "cap" in rule:
+                    score = min(score, rule["cap"])
+                if "penalty" in rule:
+                    score -= rule["penalty"]
+                break
     
     score = max(0, min(100, score))
     
-    if score >= 70:
-        verdict = "Reliable"
-    elif score >= 40:
-        verdict = "Questionable"
-    else:
-        verdict = "High Risk"
-    
     return {
         "score": score,
-        "verdict": verdict
+        "verdict": apply_bands(score, rules["bands"], rules["fallbackVerdict"])
+    }
+
+
+def calculate_final_image_result(llm_result: dict, credibility_result: dict) -> dict:
+    """
+    Combine the LLM image verdict with the technical credibility result.
+
+    The lower of the two scores wins. Scores below the top band override the
+    LLM's verdict; above it the LLM's verdict (or the technical one when the
+    LLM call failed) is kept.
+    """
+    rules = get_scoring_rules()["imageFinal"]
+    
+    llm_score = llm_result.get("credibilityScore", rules["defaultLlmScore"])
+    final_score = min(llm_score, credibility_result["score"])
+    
+    model_verdict = normalize_verdict(llm_result.get("verdict", credibility_result.get("verdict", "High Risk")))
+    
+    return {
+        "credibilityScore": final_score,
+        "verdict": apply_bands(final_score, rules["bands"], rules["fallbackVerdict"], keep_verdict=model_verdict)
     }
@@ -1,17 +1,120 @@
 import json
 import re
 import base64
-from app.config.azure import get_azure_client
+from functools import partial
 from app.config.settings import Config
+from app.services.llm_router import get_llm_router, has_tier
+from app.services.scoring_rules import get_scoring_rules, apply_bands
+
+REQUIRED_KEYS = ["riskLevel", "credibilityScore", "verdict", "explanation"]
+# Stored with every image analysis; a fast-tier answer missing any of them
+# is escalated so cached results have the same shape whichever tier answered
+IMAGE_DETAIL_KEYS = ["extractedText", "textVerification", "imageContent", "conveyedMessage", "veracityCheck"]
+
+def _parse_llm_json(content: str) -> dict:
+    if not content:
+        raise ValueError("No response content from Azure OpenAI")
+    
+    parsed_content = content.strip()
+    
+    if parsed_content.startswith("```json"):
+        parsed_content = re.sub(r'^```json\s*', '', parsed_content)
+        parsed_content = re.sub(r'\s*```$', '', parsed_content)
+    elif parsed_content.startswith("```"):
+        parsed_content = re.sub(r'^```\s*', '', parsed_content)
+        parsed_content = re.sub(r'\s*```$', '', parsed_content)
+    
+    result = json.loads(parsed_content)
+    
+    if not all(key in result for key in REQUIRED_KEYS):
+        raise ValueError("Invalid response format from Azure OpenAI")
+    
+    return result
+
+def _fast_result_is_clear(result: dict) -> bool:
+    """
+    Decide whether a fast-tier answer can be trusted without escalating.
+    
+    The model must be confident, its score must sit at least
+    LLM_CASCADE_BORDER_MARGIN away from every final verdict threshold, and
+    its verdict must agree with the band its score falls in.
+    """
+    try:
+        confidence = float(result.get("confidence", 0))
+        score = float(result.get("credibilityScore"))
+    except (TypeError, ValueError):
+        return False
+    
+    if confidence < Config.LLM_CASCADE_MIN_CONFIDENCE:
+        return False
+    
+    rules = get_scoring_rules()["final"]
+    for minimum, _ in rules["bands"]:
+        if abs(score - minimum) < Config.LLM_CASCADE_BORDER_MARGIN:
+            return False
+    
+    return result.get("verdict") == apply_bands(score, rules["bands"], rules["fallbackVerdict"])
+
+def _run_cascade(kind: str, fast_analysis, full_analysis, content, required_keys=()) -> dict:
+    if Config.LLM_CASCADE_ENABLED and has_tier("fast"):
+        try:
+            result = fast_analysis(content)
+            missing = [key for key in required_keys if key not in result]
+            if missing:
+                print(f"⬆️ Escalating {kind} analysis to full tier (fast answer missing {', '.join(missing)})")
+            elif _fast_result_is_clear(result):
+                print(f"⚡ Fast tier {kind} analysis accepted (score {result.get('credibilityScore')}, confidence {result.get('confidence')})")
+                result["modelTier"] = "fast"
+                return result
+            print(f"⬆️ Escalating {kind} analysis to full tier (score {result.get('credibilityScore')}, confidence {result.get('confidence')})")
+        except Exception as e:
+            print(f"⚠️ Fast tier {kind} analysis failed, escalating: {str(e)}")
+    
+    result = full_analysis(content)
+    result["modelTier"] = "full"
+    return result
 
 def analyze_text_with_llm(text: str) -> dict:
+    """
+    Analyze text with the model cascade: the fast tier answers clear-cut
+    cases, borderline or low-confidence ones go to the full tier. The result
+    records which tier answered in modelTier.
+    """
     if not text or not isinstance(text, str) or len(text.strip()) == 0:
         raise ValueError("Text input is required")
     
+    return _run_cascade("text", _analyze_text_fast, _analyze_text_full, text)
+
+def _analyze_text_fast(text: str) -> dict:
+    response = get_llm_router("fast").chat_completion(
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a fact-checker rating text for misinformation risk. Respond ONLY with valid JSON."
+            },
+            {
+                "role": "user",
+                "content": f"""Return JSON: {{"riskLevel": "low"|"medium"|"high", "credibilityScore": 0-100, "verdict": "Reliable"|"Questionable"|"High Risk", "riskKeywordsFound": string[], "explanation": string (one or two sentences), "confidence": 0-100 (how sure you are of this verdict)}}
+Scores: 75-100 Reliable, 40-74 Questionable, 0-39 High Risk.
+
+Text: {text}"""
+            }
+        ],
+        temperature=0.2,
+        max_tokens=250,
+        response_format={"type": "json_object"}
+    )
+    
+    result = _parse_llm_json(response.choices[0].message.content)
+    
+    if not isinstance(result.get("riskKeywordsFound"), list):
+        result["riskKeywordsFound"] = []
+    
+    return result
+
+def _analyze_text_full(text: str) -> dict:
     try:
-        client = get_azure_client()
-        response = client.chat.completions.create(
-            model=Config.AZURE_OPENAI_DEPLOYMENT,
+        response = get_llm_router().chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -50,24 +153,7 @@ Text to analyze: {text}"""
             response_format={"type": "json_object"}
         )
         
-        content = response.choices[0].message.content
-        
-        if not content:
-            raise ValueError("No response content from Azure OpenAI")
-        
-        parsed_content = content.strip()
-        
-        if parsed_content.startswith("```json"):
-            parsed_content = re.sub(r'^```json\s*', '', parsed_content)
-            parsed_content = re.sub(r'\s*```$', '', parsed_content)
-        elif parsed_content.startswith("```"):
-            parsed_content = re.sub(r'^```\s*', '', parsed_content)
-            parsed_content = re.sub(r'\s*```$', '', parsed_content)
-        
-        result = json.loads(parsed_content)
-        
-        if not all(key in result for key in ["riskLevel", "credibilityScore", "verdict", "explanation"]):
-            raise ValueError("Invalid response format from Azure OpenAI")
+        result = _parse_llm_json(response.choices[0].message.content)
         
         if not isinstance(result.get("riskKeywordsFound"), list):
             result["riskKeywordsFound"] = []
@@ -75,10 +161,10 @@ Text to analyze: {text}"""
         return result
         
     except json.JSONDecodeError as e:
-        raise ValueError(f"Failed to parse LLM response: {str(e)}")
+        raise ValueError(f"Failed to parse LLM response: {str(e)}") from e
     except Exception as e:
         print(f"Azure OpenAI text analysis failed: {str(e)}")
-        raise ValueError(f"LLM text analysis failed: {str(e)}")
+        raise ValueError(f"LLM text analysis failed: {str(e)}") from e
 
 def detect_image_mime_type(image_bytes: bytes) -> str:
     if image_bytes[:8] == b'\x89PNG\r\n\x1a\n':
@@ -92,19 +178,86 @@ def detect_image_mime_type(image_bytes: bytes) -> str:
     else:
         return "image/jpeg"
 
-def analyze_image_with_llm(image_bytes: bytes) -> dict:
+def _image_data_url(image_bytes: bytes) -> str:
+    mime_type = detect_image_mime_type(image_bytes)
+    print(f"🔍 Detected image MIME type: {mime_type}")
+    
+    base64_image = base64.b64encode(image_bytes).decode('utf-8')
+    return f"data:{mime_type};base64,{base64_image}"
+
+def _frame_grid_note(animation: dict) -> str:
+    if not animation:
+        return ""
+    return (
+        f"\n\nNote: this is a contact sheet of {len(animation['keyframes'])} distinct keyframes sampled from an "
+        f"animated {animation.get('format') or 'image'} ({animation['framesScanned']} frames), tiled in a "
+        f"{animation['columns']}x{animation['rows']} grid in playback order (left to right, top to bottom). "
+        "Judge the animation as a whole; the grid layout and empty cells are not visual red flags."
+    )
+
+def analyze_image_with_llm(image_bytes: bytes, animation: dict = None) -> dict:
+    """
+    Analyze an image with the model cascade (see analyze_text_with_llm).
+    
+    For animated images pass the keyframe contact sheet as image_bytes and
+    the extract_keyframes result as animation; the prompt then explains the
+    frame grid.
+    """
     if not image_bytes:
         raise ValueError("Image bytes are required")
     
+    note = _frame_grid_note(animation)
+    return _run_cascade(
+        "image",
+        partial(_analyze_image_fast, frame_note=note),
+        partial(_analyze_image_full, frame_note=note),
+        image_bytes,
+        required_keys=IMAGE_DETAIL_KEYS
+    )
+
+def _analyze_image_fast(image_bytes: bytes, frame_note: str = "") -> dict:
+    response = get_llm_router("fast").chat_completion(
+        messages=[
+            {
+                "role": "system",
+                "content": "You are an image forensics analyst and fact-checker. Respond ONLY with valid JSON."
+            },
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": """Rate this image for misinformation, manipulation and AI generation. Return JSON:
+{"riskLevel": "low"|"medium"|"high", "credibilityScore": 0-100, "verdict": "Reliable"|"Questionable"|"High Risk", "extractedText": string, "textVerification": string (one sentence on whether the extracted text's claims are true), "imageContent": string (one sentence), "conveyedMessage": string (one sentence), "veracityCheck": string (one sentence), "visualRedFlags": string[], "explanation": string (one or two sentences), "aiGeneratedProbability": 0-100, "confidence": 0-100 (how sure you are of this verdict)}
+Scores: 75-100 Reliable, 40-74 Questionable, 0-39 High Risk.""" + frame_note
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": _image_data_url(image_bytes),
+                            "detail": "low"
+                        }
+                    }
+                ]
+            }
+        ],
+        temperature=0.1,
+        max_tokens=600,
+        response_format={"type": "json_object"}
+    )
+    
+    result = _parse_llm_json(response.choices[0].message.content)
+    
+    if not isinstance(result.get("visualRedFlags"), list):
+        result["visualRedFlags"] = []
+    
+    return result
+
+def _analyze_image_full(image_bytes: bytes, frame_note: str = "") -> dict:
     try:
-        mime_type = detect_image_mime_type(image_bytes)
-        print(f"🔍 Detected image MIME type: {mime_type}")
-        
-        base64_image = base64.b64encode(image_bytes).decode('utf-8')
+        data_url = _image_data_url(image_bytes)
         
-        client = get_azure_client()
-        response = client.chat.completions.create(
-            model=Config.AZURE_OPENAI_DEPLOYMENT,
+        response = get_llm_router().chat_completion(
             messages=[
                 {
                     "role": "system",
@@ -150,12 +303,12 @@ Return JSON in this exact format:
   "aiGeneratedProbability": number (0-100, where 100 means definitely AI-generated)
 }
 
-Critical AI Detection Note: Even if an image looks 'good', look for subtle inconsistencies in shadows, reflections, and fine details like jewelry or text characters that might be slightly warped."""
+Critical AI Detection Note: Even if an image looks 'good', look for subtle inconsistencies in shadows, reflections, and fine details like jewelry or text characters that might be slightly warped.""" + frame_note
                         },
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:{mime_type};base64,{base64_image}"
+                                "url": data_url
                             }
                         }
                     ]
@@ -166,15 +319,7 @@ Critical AI Detection Note: Even if an image looks 'good', look for subtle incon
             response_format={"type": "json_object"}
         )
         
-        content = response.choices[0].message.content
-        
-        if not content:
-            raise ValueError("No response content from Azure OpenAI")
-        
-        result = json.loads(content.strip())
-        
-        if not all(key in result for key in ["riskLevel", "credibilityScore", "verdict", "explanation"]):
-            raise ValueError("Invalid response format from Azure OpenAI")
+        result = _parse_llm_json(response.choices[0].message.content)
         
         if not isinstance(result.get("visualRedFlags"), list):
             result["visualRedFlags"] = []
@@ -183,4 +328,4 @@ Critical AI Detection Note: Even if an image looks 'good', look for subtle incon
         
     except Exception as e:
         print(f"Azure OpenAI image analysis failed: {str(e)}")
-        raise ValueError(f"LLM image analysis failed: {str(e)}")
+        raise ValueError(f"LLM image analysis failed: {str(e)}") from e
@@ -0,0 +1,276 @@
+"""
+Router for a pool of Azure OpenAI deployments.
+
+Chat completions are spread across every configured deployment (see
+get_deployment_configs) instead of a single endpoint:
+
+    - Each call goes to the healthy deployment with the lowest
+      latency x (in-flight + 1) / weight, so faster and less busy
+      deployments take more of the traffic.
+    - A deployment that returns 429 is skipped until its Retry-After
+      passes; one that fails LLM_EJECT_AFTER_ERRORS times in a row
+      (5xx, timeouts, connection errors) is ejected for
+      LLM_EJECT_SECONDS. Such failures are retried once on another
+      deployment. Client errors (other 4xx) are raised as-is.
+    - With LLM_HEDGE_ENABLED, a call still running after the deployment's
+      LLM_HEDGE_PERCENTILE latency is duplicated to a second deployment
+      and whichever answers first wins.
+
+Deployments are grouped into tiers ("full" and the optional cheaper
+"fast" tier used by the model cascade); each tier has its own router.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from app.config.azure import create_azure_client, get_deployment_configs
+from app.config.settings import Config
+from app.utils.deadline import current_deadline
+
+
+class Deployment:
+    def __init__(self, name: str, endpoint: str, api_key: str, deployment: str, api_version: str, weight: float):
+        self.name = name
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.deployment = deployment
+        self.api_version = api_version
+        self.weight = max(weight, 0.01)
+
+        self._client = None
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=200)
+        self._latency = None
+        self._in_flight = 0
+        self._consecutive_errors = 0
+        self._unavailable_until = 0.0
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = create_azure_client(self.endpoint, self.api_key, self.api_version)
+            return self._client
+
+    def is_available(self, now: float) -> bool:
+        return self._unavailable_until <= now
+
+    def load_score(self) -> float:
+        # Unmeasured deployments look fast so they get probed early.
+        latency = self._latency if self._latency is not None else 0.0
+        return (latency + 0.001) * (self._in_flight + 1) / self.weight
+
+    def latency_percentile(self, percentile: float) -> float:
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(len(samples) * percentile / 100))
+        return samples[index]
+
+    def started(self):
+        with self._lock:
+            self._in_flight += 1
+
+    def succeeded(self, latency: float):
+        with self._lock:
+            self._in_flight -= 1
+            self._latencies.append(latency)
+            self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+            self._consecutive_errors = 0
+
+    def throttled(self, retry_after: float):
+        with self._lock:
+            self._in_flight -= 1
+            self._unavailable_until = max(self._unavailable_until, time.monotonic() + retry_after)
+        print(f"🐢 Deployment {self.name} throttled for {retry_after:g}s")
+
+    def failed(self):
+        with self._lock:
+            self._in_flight -= 1
+            self._consecutive_errors += 1
+            if self._consecutive_errors >= Config.LLM_EJECT_AFTER_ERRORS:
+                self._unavailable_until = time.monotonic() + Config.LLM_EJECT_SECONDS
+                self._consecutive_errors = 0
+                print(f"⛔ Deployment {self.name} ejected for {Config.LLM_EJECT_SECONDS:g}s")
+
+    def released(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "latency": round(self._latency, 3) if self._latency is not None else None,
+                "inFlight": self._in_flight,
+                "available": self.is_available(time.monotonic())
+            }
+
+
+def _retry_after(error) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return Config.LLM_THROTTLE_SECONDS
+
+
+def _discard(future):
+    # Result of an abandoned hedge attempt; its deployment stats were already
+    # updated by _call, so only make sure a failure does not go unnoticed.
+    if not future.cancelled() and future.exception() is not None:
+        print(f"⚠️ Abandoned hedge attempt failed: {str(future.exception())}")
+
+
+def _abandon(futures):
+    for future in futures:
+        if not future.cancel():
+            future.add_done_callback(_discard)
+
+
+def _is_retryable(error) -> bool:
+    # Throttling, server errors and transport failures (no status) may succeed
+    # elsewhere; other 4xx responses would fail on every deployment.
+    status = getattr(error, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class LLMRouter:
+    def __init__(self, deployments: list):
+        if not deployments:
+            raise ValueError("Azure OpenAI configuration missing. Check your .env file.")
+        self.deployments = deployments
+        self._hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="llm-hedge")
+
+    def _pick(self, exclude=()) -> Deployment:
+        candidates = [d for d in self.deployments if d not in exclude]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        available = [d for d in candidates if d.is_available(now)]
+        if not available:
+            # Everything is ejected or throttled: try the one that recovers first.
+            return min(candidates, key=lambda d: d._unavailable_until)
+        return min(available, key=lambda d: d.load_score())
+
+    def _call(self, deployment: Deployment, kwargs: dict, deadline=None):
+        # Hedge threads do not inherit the request context, so the deadline
+        # captured in chat_completion is passed in explicitly.
+        timeout = deadline.timeout(Config.LLM_TIMEOUT, "LLM call") if deadline else Config.LLM_TIMEOUT
+        deployment.started()
+        started = time.monotonic()
+        try:
+            response = deployment.client.chat.completions.create(model=deployment.deployment, timeout=timeout, **kwargs)
+        except Exception as e:
+            status = getattr(e, "status_code", None)
+            if status == 429:
+                deployment.throttled(_retry_after(e))
+            elif _is_retryable(e):
+                deployment.failed()
+            else:
+                deployment.released()
+            raise
+        deployment.succeeded(time.monotonic() - started)
+        return response
+
+    def _call_with_failover(self, primary: Deployment, kwargs: dict, deadline=None):
+        try:
+            return self._call(primary, kwargs, deadline)
+        except Exception as e:
+            fallback = self._pick(exclude=(primary,))
+            if not _is_retryable(e) or fallback is None:
+                raise
+            print(f"🔁 Deployment {primary.name} failed ({str(e)}), retrying on {fallback.name}")
+            return self._call(fallback, kwargs, deadline)
+
+    def _hedge_delay(self, deployment: Deployment) -> float:
+        percentile = deployment.latency_percentile(Config.LLM_HEDGE_PERCENTILE)
+        if percentile is None:
+            return None
+        return max(Config.LLM_HEDGE_MIN_DELAY, percentile)
+
+    def chat_completion(self, **kwargs):
+        """Create a chat completion on the best deployment; same kwargs as the OpenAI client minus model."""
+        deadline = current_deadline()
+        primary = self._pick()
+        delay = self._hedge_delay(primary) if Config.LLM_HEDGE_ENABLED else None
+        if delay is None or len(self.deployments) < 2:
+            return self._call_with_failover(primary, kwargs, deadline)
+
+        first = self._hedge_executor.submit(self._call, primary, kwargs, deadline)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            try:
+                return first.result()
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                secondary = self._pick(exclude=(primary,))
+                print(f"🔁 Deployment {primary.name} failed ({str(e)}), retrying on {secondary.name}")
+                return self._call(secondary, kwargs, deadline)
+
+        secondary = self._pick(exclude=(primary,))
+        print(f"⏱️ Hedging slow call on {primary.name} to {secondary.name} after {delay:.2f}s")
+        pending = {first, self._hedge_executor.submit(self._call, secondary, kwargs, deadline)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                # The slower attempt cannot be interrupted mid-request; let it
+                # finish in the background and drop its answer.
+                _abandon(pending)
+                return result
+        raise error
+
+    def warm_up(self) -> dict:
+        status = {}
+        for deployment in self.deployments:
+            try:
+                # Cheap data-plane call that opens the HTTP connection pool.
+                deployment.client.models.list()
+                status[deployment.name] = "warm"
+            except Exception as e:
+                status[deployment.name] = f"error: {str(e)}"
+        return status
+
+    def stats(self) -> list:
+        return [deployment.stats() for deployment in self.deployments]
+
+
+_routers = {}
+_router_lock = threading.Lock()
+
+
+_tier_configured = {}
+
+
+def has_tier(tier: str) -> bool:
+    # Checked on every cascaded call; parse the deployment config only once.
+    if tier not in _tier_configured:
+        _tier_configured[tier] = bool(get_deployment_configs(tier))
+    return _tier_configured[tier]
+
+
+def get_llm_router(tier: str = "full") -> LLMRouter:
+    with _router_lock:
+        if tier not in _routers:
+            _routers[tier] = LLMRouter([
+                Deployment(
+                    name=config["name"],
+                    endpoint=config["endpoint"],
+                    api_key=config["apiKey"],
+                    deployment=config["deployment"],
+                    api_version=config["apiVersion"],
+                    weight=config["weight"]
+                )
+                for config in get_deployment_configs(tier)
+            ])
+        return _routers[tier]
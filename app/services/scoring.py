@@ -1,37 +1,32 @@
+from app.services.scoring_rules import get_scoring_rules, apply_bands
+
+
 def calculate_credibility_score(risk_level: str) -> dict:
-    credibility_score = 100
+    rules = get_scoring_rules()["text"]
+    credibility_score = rules["baseScore"]
     
-    if risk_level == "medium":
-        credibility_score -= 30
-    elif risk_level == "high":
-        credibility_score -= 60
+    credibility_score -= rules["penalties"]["riskLevel"].get(risk_level, 0)
     
     credibility_score = max(0, min(100, credibility_score))
     
-    if credibility_score >= 70:
-        verdict = "Reliable"
-    elif credibility_score >= 40:
-        verdict = "Suspicious"
-    else:
-        verdict = "Unreliable"
-    
     return {
         "credibilityScore": credibility_score,
-        "verdict": verdict
+        "verdict": apply_bands(credibility_score, rules["bands"], rules["fallbackVerdict"])
     }
 
 
 def calculate_final_score(text_analysis: dict, image_analysis: dict) -> dict:
+    rules = get_scoring_rules()["final"]
     text_skipped = not text_analysis or text_analysis.get("status") == "skipped"
     
     if text_skipped:
         # Default starting score if text is skipped
-        final_score = 100
+        final_score = rules["defaultScore"]
     else:
-        final_score = text_analysis.get("credibilityScore", 100)
+        final_score = text_analysis.get("credibilityScore", rules["defaultScore"])
     
     if final_score is None:
-        final_score = 100
+        final_score = rules["defaultScore"]
     
     is_image_skipped = (
         not image_analysis or
@@ -43,8 +38,8 @@ def calculate_final_score(text_analysis: dict, image_analysis: dict) -> dict:
         if image_analysis.get("credibilityScore") is not None:
             if not text_skipped:
                 # Weighted average if both are present
-                text_weight = 0.6
-                image_weight = 0.4
+                text_weight = rules["textWeight"]
+                image_weight = rules["imageWeight"]
                 final_score = round(
                     (text_analysis.get("credibilityScore", 100) * text_weight) +
                     (image_analysis.get("credibilityScore", 100) * image_weight)
@@ -60,7 +55,7 @@ def calculate_final_score(text_analysis: dict, image_analysis: dict) -> dict:
             )
             
             if is_reused:
-                final_score -= 25
+                final_score -= rules["reusedPenalty"]
             
             has_metadata_risk = (
                 image_analysis.get("metadataRisk") is True or
@@ -69,18 +64,11 @@ def calculate_final_score(text_analysis: dict, image_analysis: dict) -> dict:
             )
             
             if has_metadata_risk:
-                final_score -= 15
+                final_score -= rules["metadataPenalty"]
     
     final_score = max(0, min(100, final_score))
     
-    if final_score >= 75:
-        final_verdict = "Reliable"
-    elif final_score >= 40:
-        final_verdict = "Questionable"
-    else:
-        final_verdict = "High Risk"
-    
     return {
         "finalScore": final_score,
-        "finalVerdict": final_verdict
+        "finalVerdict": apply_bands(final_score, rules["bands"], rules["fallbackVerdict"])
     }
@@ -0,0 +1,185 @@
+"""
+Declarative scoring rules.
+
+Every threshold and weight used by the scoring services lives in one table so
+that re-tuning is a configuration change. The same table drives two
+evaluators:
+
+    - the per-request scalar functions in scoring.py and image_scoring.py
+    - a vectorized NumPy evaluator (compile_image_rules) used to rescore
+      stored image analyses in bulk (see app/cli/rescore.py)
+
+Rules can be overridden with a JSON file at SCORING_RULES_PATH; it is deep
+merged over DEFAULT_SCORING_RULES, so it only needs the keys that change.
+
+Band lists are ordered [minimumScore, verdict] pairs checked top-down; the
+first band whose minimum the score reaches wins, otherwise fallbackVerdict.
+A verdict of null in imageFinal keeps the LLM's own verdict.
+"""
+
+import copy
+import json
+from app.config.settings import Config
+
+DEFAULT_SCORING_RULES = {
+    "text": {
+        "baseScore": 100,
+        "penalties": {
+            "riskLevel": {"medium": 30, "high": 60}
+        },
+        "bands": [[70, "Reliable"], [40, "Suspicious"]],
+        "fallbackVerdict": "Unreliable"
+    },
+    "image": {
+        "baseScore": 100,
+        "penalties": {
+            "metadataRisk": {"medium": 20, "high": 40},
+            "reusedLikelihood": {"medium": 20, "high": 40}
+        },
+        # Checked top-down, first match wins. "cap" limits the score,
+        # "penalty" subtracts from it.
+        "aiProbability": [
+            {"min": 80, "cap": 20},
+            {"min": 50, "cap": 50},
+            {"min": 20, "penalty": 15}
+        ],
+        "bands": [[70, "Reliable"], [40, "Questionable"]],
+        "fallbackVerdict": "High Risk"
+    },
+    "imageFinal": {
+        "defaultLlmScore": 100,
+        "bands": [[75, None], [40, "Questionable"]],
+        "fallbackVerdict": "High Risk"
+    },
+    "final": {
+        "defaultScore": 100,
+        "textWeight": 0.6,
+        "imageWeight": 0.4,
+        "reusedPenalty": 25,
+        "metadataPenalty": 15,
+        "bands": [[75, "Reliable"], [40, "Questionable"]],
+        "fallbackVerdict": "High Risk"
+    }
+}
+
+VALID_VERDICTS = ["Reliable", "Questionable", "High Risk"]
+
+_active_rules = None
+
+
+def normalize_verdict(verdict: str) -> str:
+    if isinstance(verdict, str) and verdict in VALID_VERDICTS:
+        return verdict
+    return "High Risk"
+
+
+def _deep_merge(base: dict, override: dict) -> dict:
+    merged = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_scoring_rules(path: str = None) -> dict:
+    """Return the default rules with the JSON file at `path` merged over them."""
+    if not path:
+        return copy.deepcopy(DEFAULT_SCORING_RULES)
+    with open(path, "r", encoding="utf-8") as f:
+        return _deep_merge(DEFAULT_SCORING_RULES, json.load(f))
+
+
+def get_scoring_rules() -> dict:
+    """Rules used for live requests, loaded once from SCORING_RULES_PATH."""
+    global _active_rules
+    if _active_rules is None:
+        _active_rules = load_scoring_rules(Config.SCORING_RULES_PATH)
+    return _active_rules
+
+
+def apply_bands(score, bands: list, fallback_verdict: str, keep_verdict: str = None) -> str:
+    for minimum, verdict in bands:
+        if score >= minimum:
+            return keep_verdict if verdict is None else verdict
+    return fallback_verdict
+
+
+def _np():
+    # NumPy is only needed for bulk evaluation, not on the request path.
+    import numpy as np
+    return np
+
+
+def _vector_bands(np, scores, bands: list, fallback_verdict: str, keep_verdicts=None):
+    conditions = []
+    choices = []
+    for minimum, verdict in bands:
+        conditions.append(scores >= minimum)
+        if verdict is None:
+            choices.append(keep_verdicts)
+        else:
+            choices.append(np.full(scores.shape, verdict, dtype=object))
+    return np.select(conditions, choices, default=fallback_verdict).astype(object)
+
+
+def _vector_penalty(np, values, penalties: dict):
+    result = np.zeros(values.shape, dtype=float)
+    for level, penalty in penalties.items():
+        result = np.where(values == level, result + penalty, result)
+    return result
+
+
+def compile_image_rules(rules: dict):
+    """
+    Compile the image rules into a vectorized evaluator.
+
+    The returned function takes equal-length columns:
+        metadataRisk, reusedLikelihood   object arrays of "low"/"medium"/"high"
+        aiProbability                    float array (0 when unknown)
+        hasLlm                           bool array, False when the LLM call failed
+        llmScore                         float array (ignored where hasLlm is False)
+        llmVerdict                       object array of normalized LLM verdicts
+    and returns techScore, techVerdict, credibilityScore and verdict columns,
+    matching calculate_image_credibility + calculate_final_image_result.
+    """
+    np = _np()
+    image_rules = rules["image"]
+    final_rules = rules["imageFinal"]
+
+    def evaluate(columns: dict) -> dict:
+        metadata_risk = np.asarray(columns["metadataRisk"], dtype=object)
+        reused = np.asarray(columns["reusedLikelihood"], dtype=object)
+        ai_prob = np.asarray(columns["aiProbability"], dtype=float)
+        has_llm = np.asarray(columns["hasLlm"], dtype=bool)
+
+        score = np.full(ai_prob.shape, float(image_rules["baseScore"]))
+        score -= _vector_penalty(np, metadata_risk, image_rules["penalties"].get("metadataRisk", {}))
+        score -= _vector_penalty(np, reused, image_rules["penalties"].get("reusedLikelihood", {}))
+
+        unmatched = ai_prob > 0
+        for rule in image_rules["aiProbability"]:
+            hit = unmatched & (ai_prob >= rule["min"])
+            if "cap" in rule:
+                score = np.where(hit, np.minimum(score, rule["cap"]), score)
+            if "penalty" in rule:
+                score = np.where(hit, score - rule["penalty"], score)
+            unmatched &= ~hit
+
+        tech_score = np.clip(score, 0, 100)
+        tech_verdict = _vector_bands(np, tech_score, image_rules["bands"], image_rules["fallbackVerdict"])
+
+        llm_score = np.where(has_llm, np.asarray(columns["llmScore"], dtype=float), final_rules["defaultLlmScore"])
+        llm_verdict = np.where(has_llm, np.asarray(columns["llmVerdict"], dtype=object), tech_verdict)
+        final_score = np.minimum(llm_score, tech_score)
+        final_verdict = _vector_bands(np, final_score, final_rules["bands"], final_rules["fallbackVerdict"], llm_verdict)
+
+        return {
+            "techScore": tech_score,
+            "techVerdict": tech_verdict,
+            "credibilityScore": final_score,
+            "verdict": final_verdict
+        }
+
+    return evaluate
@@ -0,0 +1,144 @@
+"""
+Process warmup and readiness state.
+
+Each serving process calls warm_up() once before it accepts traffic (see
+gunicorn.conf.py and run.py). It creates the Azure OpenAI and Cosmos DB
+clients, opens their connection pools, preloads recent analyses into the
+local cache (and starts following the change feed) and starts the image
+process pool, so the first user request after a scale-out does not pay for
+any of it.
+
+Readiness is separate from /api/health: health only says the process is up,
+readiness says warmup has finished. Storage and the Azure OpenAI router are
+required: if either is configured but fails to warm, the process stays
+not-ready, the failure is reported and warmup is retried every
+WARMUP_RETRY_SECONDS. Components that are not configured, and optional ones
+(analysis cache, image pool), never block readiness.
+"""
+
+import importlib
+import threading
+import time
+from app.config.settings import Config
+
+_state = {
+    "ready": False,
+    "components": {},
+    "failed": []
+}
+_lock = threading.Lock()
+
+_REQUIRED = ("cosmos", "azureOpenAI")
+
+# Client libraries imported by preload_modules(); no clients are created.
+_PRELOAD_MODULES = ("openai", "azure.cosmos", "PIL.Image")
+
+
+def preload_modules() -> list:
+    """
+    Import the heavy client libraries up front.
+
+    Called from wsgi.py, which gunicorn loads in the master (preload_app), so
+    workers fork with these modules already imported and share their pages
+    copy-on-write instead of each importing them after fork.
+    """
+    loaded = []
+    for name in _PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+            loaded.append(name)
+        except ImportError as e:
+            print(f"⚠️ Could not preload {name}: {str(e)}")
+    return loaded
+
+
+def _warm_cosmos() -> str:
+    from app.services.analysis_storage_service import warm_up_storage
+    if not Config.COSMOS_ENDPOINT or not Config.COSMOS_KEY:
+        return "not configured"
+    return "warm" if warm_up_storage() else "error: Cosmos DB connection failed"
+
+
+def _warm_analysis_cache():
+    from app.services.analysis_storage_service import preload_recent_analyses, start_change_feed
+    following = start_change_feed()
+    preloaded = preload_recent_analyses(Config.ANALYSIS_CACHE_PRELOAD)
+    if preloaded is None:
+        return "not configured"
+    return {
+        "preloaded": preloaded,
+        "changeFeed": "following" if following else "disabled"
+    }
+
+
+def _warm_azure_openai():
+    from app.config.azure import get_deployment_configs
+    if not get_deployment_configs():
+        return "not configured"
+
+    from app.services.llm_router import get_llm_router, has_tier
+    status = get_llm_router().warm_up()
+    if has_tier("fast"):
+        status.update(get_llm_router("fast").warm_up())
+    return status
+
+
+def _warm_image_pool() -> str:
+    if Config.IMAGE_POOL_MODE == "inline" or Config.IMAGE_POOL_WORKERS <= 0:
+        return "inline"
+
+    from app.utils.image_pool import get_image_pool
+    get_image_pool()
+    return "warm"
+
+
+_WARMERS = {
+    "cosmos": _warm_cosmos,
+    "analysisCache": _warm_analysis_cache,
+    "azureOpenAI": _warm_azure_openai,
+    "imagePool": _warm_image_pool
+}
+
+
+def _is_warm(status) -> bool:
+    if isinstance(status, dict):
+        # Per-deployment report: one reachable deployment is enough to serve
+        return any(not str(value).startswith("error") for value in status.values())
+    return not str(status).startswith("error")
+
+
+def warm_up() -> dict:
+    """
+    Warm every component and mark the process ready if the required ones
+    warmed. Safe to call again; later calls re-warm and refresh the report.
+    """
+    with _lock:
+        started = time.monotonic()
+        components = {}
+        for name, warmer in _WARMERS.items():
+            try:
+                components[name] = warmer()
+            except Exception as e:
+                print(f"⚠️ Warmup of {name} failed: {str(e)}")
+                components[name] = f"error: {str(e)}"
+
+        failed = [name for name in _REQUIRED if not _is_warm(components.get(name))]
+        _state["components"] = components
+        _state["failed"] = failed
+        _state["ready"] = not failed
+        print(f"🔥 Warmup finished in {time.monotonic() - started:.2f}s: {components}")
+
+    if failed:
+        print(f"❌ Not ready, required components failed to warm: {', '.join(failed)}; retrying in {Config.WARMUP_RETRY_SECONDS:g}s")
+        retry = threading.Timer(Config.WARMUP_RETRY_SECONDS, warm_up)
+        retry.daemon = True
+        retry.start()
+    return get_readiness()
+
+
+def get_readiness() -> dict:
+    return {
+        "ready": _state["ready"],
+        "components": dict(_state["components"]),
+        "failed": list(_state["failed"])
+    }
@@ -0,0 +1,82 @@
+"""
+Negotiated response compression.
+
+Large JSON and text responses are compressed with brotli when the client
+accepts it and the brotli package is installed, otherwise with gzip. Small
+bodies are sent as-is; compressing them costs more than it saves.
+"""
+
+import gzip
+from flask import request
+from app.config.settings import Config
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+_COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+
+def _accepted_encodings(header: str) -> dict:
+    accepted = {}
+    for part in header.split(","):
+        pieces = part.strip().split(";")
+        encoding = pieces[0].strip().lower()
+        if not encoding:
+            continue
+        quality = 1.0
+        for param in pieces[1:]:
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[encoding] = quality
+    return accepted
+
+
+def choose_encoding(header: str) -> str:
+    accepted = _accepted_encodings(header or "")
+    # "*" covers every encoding the header does not name explicitly
+    wildcard = accepted.get("*", 0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress_response(response):
+    if (
+        response.direct_passthrough or
+        not 200 <= response.status_code < 300 or
+        "Content-Encoding" in response.headers or
+        not (response.mimetype or "").startswith(_COMPRESSIBLE_TYPES)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    if encoding is None:
+        return response
+
+    body = response.get_data()
+    if len(body) < Config.COMPRESS_MIN_BYTES:
+        return response
+
+    if encoding == "br":
+        compressed = brotli.compress(body, quality=Config.BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=Config.GZIP_LEVEL)
+
+    response.set_data(compressed)
+    response.headers["Content-Encoding"] = encoding
+    response.headers["Content-Length"] = str(len(compressed))
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -0,0 +1,76 @@
+"""
+Per-request deadline budget.
+
+The analyze route opens a deadline for each request (from the client's
+X-Request-Deadline-Ms header or REQUEST_DEADLINE_SECONDS). Every stage that
+can block - image download, image processing, storage lookups, admission
+and LLM calls - asks for its timeout through stage_timeout(), which returns
+the stage's own cap or whatever budget is left, whichever is smaller. Once
+the budget is gone stage_timeout() raises DeadlineExceeded instead of
+starting work whose answer nobody will receive.
+
+The deadline lives in a context variable, so it follows the request thread.
+Code that hands work to other threads captures current_deadline() first and
+passes it along. Outside a request (the CLI tools) there is no deadline and
+stages simply use their caps.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a stage is reached after the request's budget has run out."""
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.budget = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float, stage: str = "next stage") -> float:
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"Request deadline of {self.budget:g}s exceeded before {stage}")
+        return min(cap, remaining) if cap is not None else remaining
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    token = _current.set(Deadline(seconds))
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def current_deadline() -> Deadline:
+    return _current.get()
+
+
+def stage_timeout(cap: float, stage: str = "next stage") -> float:
+    """Timeout for a stage: its cap, or the remaining request budget if smaller."""
+    deadline = _current.get()
+    if deadline is None:
+        return cap
+    return deadline.timeout(cap, stage)
+
+
+def remaining_time() -> float:
+    """Seconds left in the current request's budget, or None outside a request."""
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def deadline_expired() -> bool:
+    deadline = _current.get()
+    return deadline is not None and deadline.expired()
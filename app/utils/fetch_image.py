@@ -1,87 +1,117 @@
 import requests
-import io
-from PIL import Image
-from bs4 import BeautifulSoup
+from app.config.settings import Config
+from app.utils.deadline import DeadlineExceeded, deadline_expired, stage_timeout
+from app.utils.image_pool import run_image_task
+from app.utils.image_tasks import verify_image
+from app.utils.page_resolvers import (
+    resolve_from_url,
+    resolve_from_page,
+    get_cached_resolution,
+    remember_resolution,
+    forget_resolution
+)
 
-def download_image(url: str) -> dict:
+DOWNLOAD_TIMEOUT = 5
+
+_session = requests.Session()
+_session.max_redirects = Config.PAGE_MAX_REDIRECTS
+_session.headers.update({
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+})
+
+
+def _read_body(response) -> bytes:
+    # requests' timeout bounds each socket read, not the whole body, so check
+    # the request deadline between chunks of large images.
+    chunks = []
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        if deadline_expired():
+            raise DeadlineExceeded("Request deadline exceeded while downloading image")
+    return b"".join(chunks)
+
+
+def _download_resolved(page_url: str, image_url: str, depth: int) -> dict:
+    result = download_image(image_url, _depth=depth + 1)
+    if result.get("success"):
+        remember_resolution(page_url, image_url)
+    else:
+        forget_resolution(page_url)
+    return result
+
+
+def download_image(url: str, _depth: int = 0) -> dict:
+    if _depth > Config.PAGE_RESOLVE_MAX_DEPTH:
+        return {
+            "success": False,
+            "error": f"Gave up resolving page URL after {Config.PAGE_RESOLVE_MAX_DEPTH} hops"
+        }
+
+    timeout = DOWNLOAD_TIMEOUT
     try:
-        # Check for Instagram URL and try to extract direct image
-        if "instagram.com" in url:
-            try:
-                # Add /media/?size=l if it's a post URL
-                if "/p/" in url or "/reels/" in url:
-                    # Strip query params and add media suffix
-                    base_url = url.split("?")[0]
-                    if not base_url.endswith("/"):
-                        base_url += "/"
-                    media_url = base_url + "media/?size=l"
-                    
-                    print(f"📸 Detected Instagram URL, attempting to fetch from: {media_url}")
-                    
-                    media_resp = requests.get(
-                        media_url,
-                        timeout=5,
-                        headers={
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-                        },
-                        allow_redirects=True
-                    )
-                    
-                    if media_resp.status_code == 200 and "image" in media_resp.headers.get("Content-Type", ""):
-                        # Verify it's a valid image
-                        img = Image.open(io.BytesIO(media_resp.content))
-                        img.verify()
-                        return {
-                            "success": True,
-                            "buffer": media_resp.content
-                        }
-            except Exception as ig_err:
-                print(f"⚠️ Instagram direct extraction failed: {str(ig_err)}")
-                # Continue with normal download as fallback
-
-        response = requests.get(
-            url,
-            timeout=5,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-        )
-        response.raise_for_status()
-        
-        # Check if it's an image
-        content_type = response.headers.get("Content-Type", "").lower()
-        if "image" not in content_type:
-            # If it's not an image, it might be a page we can scrape for og:image
-            try:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                og_image = soup.find("meta", property="og:image")
-                if og_image and og_image.get("content"):
-                    print(f"🔗 Found og:image: {og_image['content']}")
-                    return download_image(og_image["content"])
-            except Exception as scrape_err:
-                print(f"⚠️ Scrape attempt failed: {str(scrape_err)}")
-            
-            return {
-                "success": False,
-                "error": f"URL did not return an image (Content-Type: {content_type})"
-            }
+        # A page we have resolved before goes straight to its image
+        cached_image_url = get_cached_resolution(url)
+        if cached_image_url:
+            result = _download_resolved(url, cached_image_url, _depth)
+            if result.get("success"):
+                return result
+
+        # Pages whose image URL can be derived without fetching them (Instagram)
+        direct_image_url = resolve_from_url(url)
+        if direct_image_url:
+            result = _download_resolved(url, direct_image_url, _depth)
+            if result.get("success"):
+                return result
+            print(f"⚠️ Direct extraction failed: {result.get('error')}")
+            # Continue with normal download as fallback
+
+        timeout = stage_timeout(DOWNLOAD_TIMEOUT, "image download")
+        with _session.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+
+            # Check if it's an image
+            content_type = response.headers.get("Content-Type", "").lower()
+            if "image" not in content_type:
+                # If it's not an image, it might be a page advertising one in its head
+                try:
+                    image_url = resolve_from_page(url, response, _session)
+                except Exception as scrape_err:
+                    print(f"⚠️ Scrape attempt failed: {str(scrape_err)}")
+                    image_url = None
+
+                if image_url:
+                    return _download_resolved(url, image_url, _depth)
 
-        # Verify it's a valid image using Pillow
+                return {
+                    "success": False,
+                    "error": f"URL did not return an image (Content-Type: {content_type})"
+                }
+
+            content = _read_body(response)
+
+        # Verify it's a valid image using Pillow (off the request thread)
         try:
-            img = Image.open(io.BytesIO(response.content))
-            img.verify()
+            run_image_task(verify_image, content)
         except Exception as img_err:
+            if isinstance(img_err, DeadlineExceeded) or deadline_expired():
+                raise DeadlineExceeded("Request deadline exceeded while verifying image") from img_err
             return {
                 "success": False,
                 "error": f"Downloaded data is not a valid image: {str(img_err)}"
             }
-            
+
         return {
             "success": True,
-            "buffer": response.content
+            "buffer": content
         }
-    except requests.Timeout:
-        error_message = "Image download timed out after 5 seconds"
+    except DeadlineExceeded:
+        raise
+    except requests.Timeout as e:
+        if deadline_expired():
+            raise DeadlineExceeded("Request deadline exceeded while downloading image") from e
+        error_message = f"Image download timed out after {timeout:g} seconds"
+    except requests.TooManyRedirects:
+        error_message = f"Image download exceeded {Config.PAGE_MAX_REDIRECTS} redirects"
     except requests.RequestException as e:
         if hasattr(e, 'response') and e.response is not None:
             error_message = f"Failed to download image: HTTP {e.response.status_code}"
@@ -89,9 +119,9 @@ def download_image(url: str) -> dict:
             error_message = f"Failed to download image: {str(e)}"
     except Exception as e:
         error_message = f"Failed to download image: {str(e)}"
-    
+
     print(f"[Image Download Error] {url}: {error_message}")
-    
+
     return {
         "success": False,
         "error": error_message
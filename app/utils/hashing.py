@@ -1,4 +1,7 @@
 import hashlib
+import re
+
+SHA256_HEX = re.compile(r'^[0-9a-f]{64}$')
 
 def hash_image(image_bytes: bytes) -> str:
     """
@@ -19,3 +22,13 @@ def hash_text(text: str) -> str:
     """
     normalized = text.strip().lower()
     return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def is_valid_hash(value: str) -> bool:
+    """
+    Check that a client-supplied value looks like a lowercase hex SHA-256 digest.
+    
+    Clients computing hashes locally must match hash_text (strip, lowercase,
+    UTF-8) for text and hash the exact file bytes for images.
+    """
+    return isinstance(value, str) and SHA256_HEX.match(value) is not None
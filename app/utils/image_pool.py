@@ -0,0 +1,238 @@
+"""
+Managed process pool for CPU-bound image work.
+
+Pillow decoding holds the GIL, so running it on request threads serializes
+every threaded worker behind the heaviest image. Tasks submitted here run in
+separate worker processes instead:
+
+    - Image bytes are handed over through shared memory, not pickled through
+      the pipe. Only the task function reference and its small kwargs are sent.
+    - Every task has a timeout. A worker that overruns it (for example while
+      decoding a decompression bomb) is killed and replaced.
+    - IMAGE_POOL_MODE=inline runs tasks on the calling thread, which keeps
+      tests and local debugging free of subprocesses.
+
+Task functions must be importable module-level callables taking the image
+bytes as their first argument and returning a picklable result.
+"""
+
+import atexit
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from app.config.settings import Config
+from app.utils.deadline import DeadlineExceeded, stage_timeout
+from app.utils.image_tasks import configure_worker
+
+
+class ImageTaskError(Exception):
+    """Raised when an image task fails or its worker dies."""
+
+
+class ImageTaskTimeout(ImageTaskError):
+    """Raised when an image task exceeds its timeout."""
+
+
+def _apply_memory_limit(memory_mb: int):
+    if memory_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError):
+        # Not available on every platform; the task timeout still applies.
+        pass
+
+
+def _worker_main(conn, memory_mb: int, initializer=None):
+    _apply_memory_limit(memory_mb)
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        func, shm_name, size, kwargs = message
+        # Workers share the parent's resource tracker, and the parent unlinks
+        # the segment once the result is back.
+        shm = shared_memory.SharedMemory(name=shm_name)
+        try:
+            with shm.buf[:size] as view:
+                data = bytes(view)
+            conn.send(("ok", func(data, **kwargs)))
+        except BaseException as e:
+            conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+        finally:
+            shm.close()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+
+    def kill(self):
+        try:
+            self.process.kill()
+            self.process.join(timeout=1)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class ImagePool:
+    def __init__(self, workers: int, start_method: str, memory_mb: int, initializer=None):
+        self._ctx = multiprocessing.get_context(start_method)
+        self._memory_mb = memory_mb
+        self._initializer = initializer
+        self._idle = queue.Queue()
+        self._workers = set()
+        self._lock = threading.Lock()
+        self._closed = False
+
+        for _ in range(workers):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self._memory_mb, self._initializer),
+            daemon=True
+        )
+        process.start()
+        child_conn.close()
+
+        worker = _Worker(process, parent_conn)
+        with self._lock:
+            self._workers.add(worker)
+        return worker
+
+    def _replace(self, worker: _Worker):
+        worker.kill()
+        with self._lock:
+            self._workers.discard(worker)
+            closed = self._closed
+        if not closed:
+            self._idle.put(self._spawn())
+
+    def run(self, func, image_bytes: bytes, timeout: float, **kwargs):
+        if self._closed:
+            raise ImageTaskError("Image pool is shut down")
+
+        deadline = time.monotonic() + timeout
+        try:
+            worker = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise ImageTaskTimeout(f"No image worker became available within {timeout:g} seconds")
+
+        size = len(image_bytes)
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        healthy = False
+        try:
+            shm.buf[:size] = image_bytes
+            worker.conn.send((func, shm.name, size, kwargs))
+
+            if not worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                raise ImageTaskTimeout(f"{func.__name__} timed out after {timeout:g} seconds")
+
+            status, payload = worker.conn.recv()
+            healthy = True
+        except (EOFError, OSError) as e:
+            raise ImageTaskError(f"Image worker died while running {func.__name__}: {str(e)}")
+        finally:
+            shm.close()
+            shm.unlink()
+            if healthy:
+                self._idle.put(worker)
+            else:
+                self._replace(worker)
+
+        if status == "error":
+            raise ImageTaskError(payload)
+        return payload
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            workers = list(self._workers)
+            self._workers.clear()
+
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except Exception:
+                pass
+        for worker in workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.kill()
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_image_pool() -> ImagePool:
+    """
+    Lazily create the process pool for the current process.
+
+    The pid check makes the pool fork-safe: a pool inherited from a parent
+    (for example a preloaded gunicorn master) is discarded and rebuilt.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ImagePool(
+                workers=max(1, Config.IMAGE_POOL_WORKERS),
+                start_method=Config.IMAGE_POOL_START_METHOD,
+                memory_mb=Config.IMAGE_WORKER_MEMORY_MB,
+                initializer=configure_worker
+            )
+            _pool_pid = os.getpid()
+            print(f"✅ Image process pool started with {max(1, Config.IMAGE_POOL_WORKERS)} workers")
+        return _pool
+
+
+def run_image_task(func, image_bytes: bytes, timeout: float = None, **kwargs):
+    """
+    Run a CPU-bound image task and return its result.
+
+    Raises ImageTaskTimeout if the task overruns, ImageTaskError for any other
+    failure inside the task. The timeout never exceeds the remaining request
+    deadline; DeadlineExceeded is raised as-is when that has run out.
+    """
+    timeout = stage_timeout(Config.IMAGE_TASK_TIMEOUT if timeout is None else timeout, "image processing")
+
+    if Config.IMAGE_POOL_MODE == "inline" or Config.IMAGE_POOL_WORKERS <= 0:
+        try:
+            return func(image_bytes, **kwargs)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            raise ImageTaskError(f"{type(e).__name__}: {str(e)}") from e
+
+    return get_image_pool().run(func, image_bytes, timeout, **kwargs)
+
+
+def shutdown_image_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.shutdown()
+        _pool = None
+
+
+atexit.register(shutdown_image_pool)
@@ -0,0 +1,146 @@
+"""
+CPU-bound image tasks.
+
+These run inside the image process pool (see app.utils.image_pool), so each
+function is module-level, takes the raw image bytes first and returns plain
+picklable data.
+"""
+
+import io
+import math
+import warnings
+from app.config.settings import Config
+
+
+def configure_worker():
+    """
+    Image pool worker initializer: point Pillow's own decompression bomb
+    checks at IMAGE_MAX_PIXELS and make its warning fatal. Only pool workers
+    run this; the request process keeps Pillow's global settings untouched.
+    """
+    from PIL import Image
+    Image.MAX_IMAGE_PIXELS = Config.IMAGE_MAX_PIXELS
+    # Pillow only warns between MAX_IMAGE_PIXELS and twice that; treat it as fatal.
+    warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+
+def _open_image(image_bytes: bytes):
+    from PIL import Image
+    img = Image.open(io.BytesIO(image_bytes))
+    # Opening only reads the header, so the size is known before any decoding.
+    # Checked here too so inline mode enforces the limit without configure_worker.
+    pixels = img.width * img.height
+    if pixels > Config.IMAGE_MAX_PIXELS:
+        img.close()
+        raise Image.DecompressionBombError(
+            f"Image size ({pixels} pixels) exceeds limit of {Config.IMAGE_MAX_PIXELS} pixels"
+        )
+    return img
+
+
+def verify_image(image_bytes: bytes) -> dict:
+    """
+    Verify that the bytes are a decodable image within the pixel limit.
+    """
+    with _open_image(image_bytes) as img:
+        info = {
+            "format": img.format,
+            "width": img.width,
+            "height": img.height
+        }
+        img.verify()
+    return info
+
+
+def _dhash(frame) -> int:
+    # Difference hash: 9x8 grayscale thumbnail, one bit per horizontal step.
+    pixels = frame.convert("L").resize((9, 8)).tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def _evenly_spaced(items: list, count: int) -> list:
+    if len(items) <= count:
+        return items
+    step = (len(items) - 1) / (count - 1) if count > 1 else 0
+    return [items[round(i * step)] for i in range(count)]
+
+
+def extract_keyframes(image_bytes: bytes, max_keyframes: int = None, max_scan_frames: int = None,
+                      dedupe_distance: int = None, tile_size: int = None) -> dict:
+    """
+    Sample an animated GIF/WebP into a contact sheet of distinct keyframes.
+
+    Frames are decoded one at a time (at most max_scan_frames). A frame whose
+    difference hash is within dedupe_distance bits of the last kept frame is
+    dropped; the remaining frames are thinned evenly to max_keyframes, decoded
+    again and tiled in playback order (left to right, top to bottom) into one
+    JPEG.
+    frameHashes lists the hash of every kept frame, not only the keyframes.
+    Still images return {"animated": False}.
+    """
+    from PIL import Image, ImageSequence
+
+    max_keyframes = max(1, max_keyframes or Config.ANIMATION_MAX_KEYFRAMES)
+    max_scan_frames = max_scan_frames or Config.ANIMATION_MAX_SCAN_FRAMES
+    dedupe_distance = Config.ANIMATION_DEDUPE_DISTANCE if dedupe_distance is None else dedupe_distance
+    tile_size = tile_size or Config.ANIMATION_TILE_SIZE
+
+    with _open_image(image_bytes) as img:
+        if not getattr(img, "is_animated", False):
+            return {"animated": False}
+
+        image_format = img.format
+        kept = []
+        scanned = 0
+        last_hash = None
+        for index, frame in enumerate(ImageSequence.Iterator(img)):
+            if index >= max_scan_frames:
+                break
+            scanned += 1
+            frame_hash = _dhash(frame)
+            if last_hash is not None and bin(frame_hash ^ last_hash).count("1") <= dedupe_distance:
+                continue
+            last_hash = frame_hash
+            kept.append((index, frame_hash))
+
+        # Only the tiled frames are decoded again and kept as thumbnails, so
+        # memory stays bounded by the keyframe count. Seeking in playback
+        # order keeps this a single forward pass.
+        keyframes = []
+        for index, frame_hash in _evenly_spaced(kept, max_keyframes):
+            img.seek(index)
+            thumbnail = img.convert("RGB")
+            thumbnail.thumbnail((tile_size, tile_size))
+            keyframes.append((index, frame_hash, thumbnail))
+
+    columns = math.ceil(math.sqrt(len(keyframes)))
+    rows = math.ceil(len(keyframes) / columns)
+
+    sheet = Image.new("RGB", (columns * tile_size, rows * tile_size), (255, 255, 255))
+    for position, (_, _, thumbnail) in enumerate(keyframes):
+        cell_x = (position % columns) * tile_size
+        cell_y = (position // columns) * tile_size
+        sheet.paste(thumbnail, (
+            cell_x + (tile_size - thumbnail.width) // 2,
+            cell_y + (tile_size - thumbnail.height) // 2
+        ))
+
+    output = io.BytesIO()
+    sheet.save(output, format="JPEG", quality=85)
+    return {
+        "animated": True,
+        "format": image_format,
+        "framesScanned": scanned,
+        "distinctFrames": len(kept),
+        "keyframes": [{"index": index, "hash": f"{frame_hash:016x}"} for index, frame_hash, _ in keyframes],
+        "frameHashes": [f"{frame_hash:016x}" for _, frame_hash in kept],
+        "columns": columns,
+        "rows": rows,
+        "contactSheet": output.getvalue()
+    }
@@ -0,0 +1,214 @@
+"""
+Resolvers that turn a page URL into the URL of the image it represents.
+
+When a submitted imageUrl points at an HTML page rather than an image, the
+downloader asks these resolvers for the real image. Resolvers come in two
+kinds:
+
+    - URL resolvers map the page URL straight to an image URL without fetching
+      anything (for example Instagram's /media/ endpoint).
+    - Head resolvers look at the <meta>/<link> tags of the page. Only the
+      document head is streamed and parsed: reading stops at </head> (or the
+      first <body> tag) or after PAGE_HEAD_MAX_BYTES, whichever comes first.
+
+Resolutions are cached per page URL so repeated submissions of a popular
+post skip the page fetch entirely.
+"""
+
+import codecs
+import re
+from html.parser import HTMLParser
+from typing import Optional
+from urllib.parse import urljoin, urlparse
+from app.config.settings import Config
+from app.utils.deadline import deadline_expired, stage_timeout
+from app.utils.ttl_cache import TTLCache
+
+
+class HeadMetadata:
+    def __init__(self):
+        self.meta = {}
+        self.links = []
+
+    def first_meta(self, *keys) -> Optional[str]:
+        for key in keys:
+            value = self.meta.get(key)
+            if value:
+                return value
+        return None
+
+
+class _HeadParser(HTMLParser):
+    """Incremental parser that records head <meta>/<link> tags and stops at the body."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.metadata = HeadMetadata()
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "body":
+            self.done = True
+            return
+
+        attributes = {name.lower(): value for name, value in attrs if value is not None}
+        if tag == "meta":
+            key = (attributes.get("property") or attributes.get("name") or "").strip().lower()
+            content = attributes.get("content")
+            if key and content and key not in self.metadata.meta:
+                self.metadata.meta[key] = content.strip()
+        elif tag == "link":
+            self.metadata.links.append(attributes)
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.done = True
+
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+
+def _page_encoding(response, first_chunk: bytes) -> str:
+    # requests reports ISO-8859-1 for text/html without a charset parameter,
+    # so only trust its encoding when the header actually declares one.
+    if "charset=" in response.headers.get("Content-Type", "").lower() and response.encoding:
+        candidate = response.encoding
+    else:
+        match = _META_CHARSET.search(first_chunk)
+        candidate = match.group(1).decode("ascii") if match else "utf-8"
+    try:
+        return codecs.lookup(candidate).name
+    except LookupError:
+        return "utf-8"
+
+
+def read_head(response) -> HeadMetadata:
+    """
+    Stream a page response just far enough to collect its head metadata.
+    """
+    parser = _HeadParser()
+    decoder = None
+    received = 0
+
+    for chunk in response.iter_content(chunk_size=8192):
+        if decoder is None:
+            decoder = codecs.getincrementaldecoder(_page_encoding(response, chunk))(errors="replace")
+        received += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or received >= Config.PAGE_HEAD_MAX_BYTES or deadline_expired():
+            break
+
+    response.close()
+    return parser.metadata
+
+
+class PageResolver:
+    name = "base"
+
+    def matches(self, url: str) -> bool:
+        return True
+
+
+class InstagramResolver(PageResolver):
+    name = "instagram"
+
+    def matches(self, url: str) -> bool:
+        parsed = urlparse(url)
+        # Our own output (.../media/?size=l) is already the image endpoint
+        if parsed.path.rstrip("/").endswith("/media"):
+            return False
+        return parsed.netloc.endswith("instagram.com") and any(
+            segment in parsed.path for segment in ("/p/", "/reel/", "/reels/")
+        )
+
+    def resolve_url(self, url: str) -> Optional[str]:
+        # Strip query params and add the media suffix
+        base_url = url.split("?")[0]
+        if not base_url.endswith("/"):
+            base_url += "/"
+        return base_url + "media/?size=l"
+
+
+class OpenGraphResolver(PageResolver):
+    name = "opengraph"
+
+    def resolve_head(self, url: str, head: HeadMetadata, session) -> Optional[str]:
+        return head.first_meta("og:image:secure_url", "og:image:url", "og:image")
+
+
+class TwitterCardResolver(PageResolver):
+    name = "twitter"
+
+    def resolve_head(self, url: str, head: HeadMetadata, session) -> Optional[str]:
+        return head.first_meta("twitter:image", "twitter:image:src")
+
+
+class OEmbedResolver(PageResolver):
+    name = "oembed"
+
+    def resolve_head(self, url: str, head: HeadMetadata, session) -> Optional[str]:
+        endpoint = None
+        for link in head.links:
+            if link.get("type", "").lower() == "application/json+oembed" and link.get("href"):
+                endpoint = urljoin(url, link["href"])
+                break
+        if not endpoint:
+            return None
+
+        response = session.get(endpoint, timeout=stage_timeout(Config.PAGE_RESOLVE_TIMEOUT, "oEmbed lookup"))
+        response.raise_for_status()
+        data = response.json()
+        if data.get("type") == "photo" and data.get("url"):
+            return data["url"]
+        return data.get("thumbnail_url")
+
+
+URL_RESOLVERS = [InstagramResolver()]
+HEAD_RESOLVERS = [OpenGraphResolver(), TwitterCardResolver(), OEmbedResolver()]
+
+_resolution_cache = TTLCache(Config.PAGE_RESOLVE_CACHE_SIZE, Config.PAGE_RESOLVE_CACHE_TTL)
+
+
+def get_cached_resolution(page_url: str) -> Optional[str]:
+    return _resolution_cache.get(page_url)
+
+
+def remember_resolution(page_url: str, image_url: str):
+    _resolution_cache.set(page_url, image_url)
+
+
+def forget_resolution(page_url: str):
+    _resolution_cache.pop(page_url)
+
+
+def resolve_from_url(url: str) -> Optional[str]:
+    """Return an image URL derived from the page URL alone, if any resolver knows how."""
+    for resolver in URL_RESOLVERS:
+        if resolver.matches(url):
+            image_url = resolver.resolve_url(url)
+            if image_url:
+                print(f"🔗 {resolver.name} resolver mapped page to: {image_url}")
+                return image_url
+    return None
+
+
+def resolve_from_page(url: str, response, session) -> Optional[str]:
+    """
+    Read the head of an HTML page response and return the image it advertises.
+    """
+    head = read_head(response)
+    for resolver in HEAD_RESOLVERS:
+        if not resolver.matches(url):
+            continue
+        try:
+            image_url = resolver.resolve_head(url, head, session)
+        except Exception as e:
+            print(f"⚠️ {resolver.name} resolver failed: {str(e)}")
+            continue
+        if image_url:
+            image_url = urljoin(url, image_url)
+            print(f"🔗 Found {resolver.name} image: {image_url}")
+            return image_url
+    return None
@@ -0,0 +1,68 @@
+"""
+Field projection for analyze responses.
+
+Clients that only need the verdict (the extension badge, batch callers) can
+ask for a subset of the response instead of the full analysis trees:
+
+    ?view=compact             scores, verdicts and hashes only
+    ?fields=finalResult,hash  explicit dot-separated paths
+
+"success" is always kept so clients can tell errors apart.
+"""
+
+COMPACT_FIELDS = [
+    "hash",
+    "reused",
+    "finalResult",
+    "textAnalysis.status",
+    "textAnalysis.riskLevel",
+    "textAnalysis.credibilityScore",
+    "textAnalysis.verdict",
+    "imageAnalysis.status",
+    "imageAnalysis.credibilityScore",
+    "imageAnalysis.verdict",
+    "imageAnalysis.reused",
+    "imageAnalysis.error"
+]
+
+VIEWS = ("full", "compact")
+
+
+def parse_fields(fields=None, view: str = None) -> list:
+    """
+    Turn the fields/view request parameters into a list of paths to keep,
+    or None for the full response.
+    """
+    if fields:
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        paths = [path.strip() for path in fields if path and path.strip()]
+        if paths:
+            return paths
+    if view == "compact":
+        return COMPACT_FIELDS
+    return None
+
+
+def project(payload: dict, paths: list) -> dict:
+    """Return a copy of payload containing only the given dot-separated paths."""
+    if not paths:
+        return payload
+
+    result = {"success": payload.get("success")}
+    for path in paths:
+        keys = path.split(".")
+        source = payload
+        for key in keys:
+            if not isinstance(source, dict) or key not in source:
+                break
+            source = source[key]
+        else:
+            target = result
+            for key in keys[:-1]:
+                existing = target.get(key)
+                if not isinstance(existing, dict):
+                    existing = target[key] = {}
+                target = existing
+            target[keys[-1]] = source
+    return result
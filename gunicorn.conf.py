@@ -0,0 +1,40 @@
+"""
+Production gunicorn configuration for the TrustLens backend.
+
+    gunicorn -c gunicorn.conf.py
+
+The app is preloaded in the master, and wsgi.py imports the heavy client
+libraries (openai, azure.cosmos, Pillow, NumPy) there, so workers fork with
+them already imported. Network clients are not created in the master (they
+are not fork-safe); each worker warms its own Azure OpenAI client, Cosmos DB
+container and image process pool in post_worker_init, before it starts
+accepting connections. /api/ready reports 200 once storage and Azure OpenAI
+have warmed.
+"""
+
+import os
+
+wsgi_app = "wsgi:app"
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+# Keep threads above LLM_MAX_CONCURRENT + LLM_MAX_QUEUE so cache hits always
+# find a free thread while LLM-bound requests are queued.
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+preload_app = True
+
+# LLM calls dominate request time; keep the worker timeout above the slowest
+# expected analysis rather than gunicorn's 30 s default.
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    from app.services.warmup import warm_up
+    warm_up()
@@ -6,8 +6,13 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from app.main import create_app
 from app.config.settings import Config
 
-app = create_app()
-
 if __name__ == '__main__':
+    # Development server. In production run `gunicorn -c gunicorn.conf.py`,
+    # which serves wsgi:app and warms each worker before it serves.
+    # The app is only built here: spawned image pool workers re-import this
+    # module and must not construct an app of their own.
+    from app.services.warmup import warm_up
+    app = create_app()
+    warm_up()
     print(f"🚀 TrustLens backend running on port {Config.PORT}")
     app.run(host='0.0.0.0', port=Config.PORT, debug=False, use_reloader=False)
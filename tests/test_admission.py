@@ -0,0 +1,66 @@
+import threading
+import pytest
+from app.services.admission import AdmissionController, Overloaded
+
+
+def _controller(max_concurrent=1, max_queue=0):
+    return AdmissionController(max_concurrent, max_queue, max_wait=0.2, initial_service_time=1)
+
+
+def test_sheds_when_slots_and_queue_are_full():
+    controller = _controller()
+    with controller.admit():
+        with pytest.raises(Overloaded) as excinfo:
+            with controller.admit():
+                pass
+    assert excinfo.value.retry_after >= 1
+    assert controller.stats()["active"] == 0
+
+
+def test_request_scope_admits_once_and_holds_the_slot():
+    controller = _controller()
+    with controller.request_scope():
+        with controller.admit():
+            assert controller.stats()["active"] == 1
+        # Still held between stages, and later stages reuse it
+        assert controller.stats()["active"] == 1
+        with controller.admit():
+            assert controller.stats()["active"] == 1
+    assert controller.stats()["active"] == 0
+
+
+def test_request_scope_without_llm_work_takes_no_slot():
+    controller = _controller()
+    with controller.request_scope():
+        assert controller.stats()["active"] == 0
+        with controller.admit():
+            pass
+    with controller.admit():
+        pass
+
+
+def test_other_requests_are_shed_while_a_scope_holds_the_slot():
+    controller = _controller()
+    errors = []
+
+    def other_request():
+        try:
+            with controller.admit():
+                pass
+        except Overloaded as e:
+            errors.append(e)
+
+    with controller.request_scope():
+        with controller.admit():
+            pass
+        thread = threading.Thread(target=other_request)
+        thread.start()
+        thread.join(5)
+    assert len(errors) == 1
+
+
+def test_disabled_controller_admits_everything():
+    controller = _controller()
+    controller.disable()
+    with controller.admit(), controller.admit(), controller.admit():
+        assert controller.stats()["active"] == 0
@@ -0,0 +1,152 @@
+import pytest
+from app.services import analysis_storage_service as storage
+from app.utils.ttl_cache import TTLCache
+
+exceptions = pytest.importorskip("azure.cosmos.exceptions")
+
+HASH_A = "a" * 64
+HASH_B = "b" * 64
+HASH_C = "c" * 64
+
+
+class FakeFeed:
+    def __init__(self, documents: list):
+        self._documents = documents
+        self.continuation_token = "next"
+
+    def by_page(self):
+        return self
+
+    def __iter__(self):
+        return iter([self._documents])
+
+
+class FakeContainer:
+    """The few Cosmos DB container calls the storage service makes."""
+
+    def __init__(self):
+        self.items = {}
+        self.reads = []
+        self.queries = []
+        self.feed = []
+
+    def upsert_item(self, body, timeout=None):
+        self.items[body["id"]] = dict(body)
+
+    def read_item(self, item, partition_key, timeout=None):
+        self.reads.append(item)
+        if item not in self.items:
+            raise exceptions.CosmosResourceNotFoundError(status_code=404, message="Not found")
+        return dict(self.items[item])
+
+    def query_items(self, query, parameters=(), **kwargs):
+        self.queries.append((query, [parameter["value"] for parameter in parameters]))
+        named = {parameter["name"]: parameter["value"] for parameter in parameters}
+        items = [dict(item) for item in self.items.values() if not item.get("invalidated")]
+        if "@limit" in named:
+            # Insertion order stands in for _ts; newest first
+            excluded = named.get("@frameBand")
+            return [item for item in reversed(items) if item.get("type") != excluded][:named["@limit"]]
+        return [item for item in items if item["hash"] in named.values()]
+
+    def query_items_change_feed(self, **kwargs):
+        return FakeFeed(self.feed)
+
+
+@pytest.fixture
+def container(monkeypatch):
+    fake = FakeContainer()
+    monkeypatch.setattr(storage, "_container", fake)
+    monkeypatch.setattr(storage, "_local_cache", TTLCache(100, 60))
+    return fake
+
+
+class StopFeed(Exception):
+    pass
+
+
+def _read_change_feed_once(container, monkeypatch):
+    # The follower sleeps between polls; stop it there after one read
+    def stop(seconds):
+        raise StopFeed()
+
+    monkeypatch.setattr(storage.time, "sleep", stop)
+    with pytest.raises(StopFeed):
+        storage._follow_change_feed(container, start_time=None)
+
+
+def _analysis(hash_value: str) -> dict:
+    return {"id": hash_value, "hash": hash_value, "type": "text", "analysis": {"verdict": "Reliable"}}
+
+
+def test_stored_analysis_is_served_from_the_local_cache(container):
+    storage.store_analysis(HASH_A, "text", {"verdict": "Reliable"})
+    assert storage.get_analysis_by_hash(HASH_A)["analysis"] == {"verdict": "Reliable"}
+    assert container.reads == []
+
+
+def test_invalidation_evicts_the_local_cache(container):
+    storage.store_analysis(HASH_A, "text", {"verdict": "Reliable"})
+    assert storage.invalidate_analysis(HASH_A, reason="wrong verdict")["success"]
+
+    # Falls through to Cosmos DB, which now holds the tombstone
+    assert storage.get_analysis_by_hash(HASH_A) is None
+    assert container.reads == [HASH_A]
+
+
+def test_tombstone_read_from_cosmos_is_a_miss_and_not_cached(container):
+    container.items[HASH_A] = {"id": HASH_A, "hash": HASH_A, "invalidated": True}
+    assert storage.get_analysis_by_hash(HASH_A) is None
+    assert storage.get_analysis_by_hash(HASH_A) is None
+    assert container.reads == [HASH_A, HASH_A]
+
+
+def test_batch_lookup_queries_only_cache_misses(container):
+    storage.store_analysis(HASH_A, "text", {"verdict": "Reliable"})
+    container.items[HASH_B] = _analysis(HASH_B)
+
+    found = storage.get_analyses_by_hashes([HASH_A, HASH_B, HASH_C])
+    assert set(found) == {HASH_A, HASH_B}
+    assert [values for _, values in container.queries] == [[HASH_B, HASH_C]]
+
+    # Both hits are now local; nothing left to query
+    assert set(storage.get_analyses_by_hashes([HASH_A, HASH_B])) == {HASH_A, HASH_B}
+    assert len(container.queries) == 1
+
+
+def test_change_feed_applies_writes_and_tombstones(container, monkeypatch):
+    storage.store_analysis(HASH_A, "text", {"verdict": "Reliable"})
+    container.feed = [
+        {"id": HASH_A, "hash": HASH_A, "invalidated": True},
+        _analysis(HASH_B)
+    ]
+
+    _read_change_feed_once(container, monkeypatch)
+
+    assert HASH_A not in storage._local_cache
+    assert storage.get_analysis_by_hash(HASH_B)["hash"] == HASH_B
+    assert container.reads == []
+
+
+def _frame_band(band_id: str) -> dict:
+    return {"id": band_id, "hash": band_id, "type": "frameband", "frames": {"00000000000000ff": [HASH_A]}}
+
+
+def test_frame_bands_stay_out_of_the_local_cache(container, monkeypatch):
+    container.feed = [_frame_band("frameband-0-00ff")]
+    _read_change_feed_once(container, monkeypatch)
+    assert "frameband-0-00ff" not in storage._local_cache
+
+    container.items["frameband-0-00ff"] = _frame_band("frameband-0-00ff")
+    assert "frameband-0-00ff" in storage.get_analyses_by_hashes(["frameband-0-00ff"])
+    assert "frameband-0-00ff" not in storage._local_cache
+
+
+def test_preload_skips_frame_bands(container):
+    container.items[HASH_A] = _analysis(HASH_A)
+    container.items[HASH_B] = _analysis(HASH_B)
+    container.items["frameband-0-00ff"] = _frame_band("frameband-0-00ff")
+    container.items["frameband-1-0000"] = _frame_band("frameband-1-0000")
+
+    assert storage.preload_recent_analyses(2) == 2
+    assert HASH_A in storage._local_cache and HASH_B in storage._local_cache
@@ -0,0 +1,104 @@
+import io
+import pytest
+from app.config.settings import Config
+from app.main import create_app
+from app.routes import analyze as analyze_route
+from app.services import analysis_pipeline
+from app.utils.deadline import DeadlineExceeded
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(Config, "MAX_UPLOAD_BYTES", 1024)
+    return create_app().test_client()
+
+
+def test_json_body_must_be_an_object(client):
+    response = client.post("/api/analyze", json=["text", "imageUrl"])
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+@pytest.mark.parametrize("body", [["a" * 64], "x", 5])
+def test_hash_lookup_body_must_be_an_object(client, body):
+    response = client.post("/api/analyze/hash", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_upload_over_limit_is_rejected(client):
+    response = client.post(
+        "/api/analyze",
+        data={"image": (io.BytesIO(b"x" * 200_000), "big.png")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 413
+
+
+def test_chunked_upload_over_limit_is_rejected(client):
+    body = (
+        b'--b\r\nContent-Disposition: form-data; name="image"; filename="big.png"\r\n\r\n'
+        + b"x" * 200_000
+        + b"\r\n--b--\r\n"
+    )
+    response = client.post(
+        "/api/analyze",
+        input_stream=io.BytesIO(body),
+        headers={"Content-Type": "multipart/form-data; boundary=b", "Transfer-Encoding": "chunked"},
+        # What a server sets for a chunked body without Content-Length
+        environ_overrides={"wsgi.input_terminated": True}
+    )
+    assert response.status_code == 413
+
+
+def test_upload_within_limit_is_analyzed(client, monkeypatch):
+    monkeypatch.setattr(analyze_route, "analyze_image_upload", lambda data: {
+        "analysis": {"status": "processed", "credibilityScore": 80, "verdict": "Reliable", "size": len(data)},
+        "hash": "a" * 64,
+        "reused": False
+    })
+    response = client.post(
+        "/api/analyze",
+        data={"image": (io.BytesIO(b"x" * 100), "small.png")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 200
+    assert response.get_json()["imageAnalysis"]["size"] == 100
+
+
+def test_oversized_json_body_is_rejected(client):
+    response = client.post("/api/analyze", json={"text": "x" * 200_000})
+    assert response.status_code == 413
+
+
+def test_image_verify_past_deadline_returns_504(client, monkeypatch):
+    def expire(func, image_bytes, **kwargs):
+        raise DeadlineExceeded("Request deadline exceeded")
+
+    monkeypatch.setattr(analysis_pipeline, "run_image_task", expire)
+    response = client.post(
+        "/api/analyze",
+        data={"image": (io.BytesIO(b"x" * 100), "small.png")},
+        content_type="multipart/form-data"
+    )
+    assert response.status_code == 504
+    assert response.get_json()["success"] is False
+
+
+def test_text_survives_image_running_out_of_time(client, monkeypatch):
+    def expire(url):
+        raise DeadlineExceeded("Request deadline exceeded while downloading image")
+
+    monkeypatch.setattr(analyze_route, "analyze_text", lambda text: {
+        "analysis": {"riskLevel": "low", "credibilityScore": 90, "verdict": "Reliable"},
+        "hash": "b" * 64,
+        "reused": False
+    })
+    monkeypatch.setattr(analyze_route, "analyze_image_url", expire)
+    response = client.post("/api/analyze", json={"text": "Some claim", "imageUrl": "https://example.com/a.png"})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["textAnalysis"]["verdict"] == "Reliable"
+    assert body["imageAnalysis"]["status"] == "skipped"
+    assert body["imageAnalysis"]["degraded"] is True
+    assert body["hash"] == "b" * 64
@@ -0,0 +1,121 @@
+import io
+import pytest
+from app.services import analysis_storage_service as storage
+
+Image = pytest.importorskip("PIL.Image")
+np = pytest.importorskip("numpy")
+from PIL import ImageSequence
+from app.utils.image_tasks import extract_keyframes
+
+
+def _save_gif(frames: list) -> bytes:
+    # Fast octree quantization keeps encoding quick; the default is slow
+    frames = [frame.quantize(method=Image.Quantize.FASTOCTREE) for frame in frames]
+    output = io.BytesIO()
+    frames[0].save(output, format="GIF", save_all=True, append_images=frames[1:], duration=80, loop=0)
+    return output.getvalue()
+
+
+def _frames(data: bytes) -> list:
+    with Image.open(io.BytesIO(data)) as img:
+        return [frame.convert("RGB") for frame in ImageSequence.Iterator(img)]
+
+
+def make_gif(seed: int = 7, count: int = 30, size: int = 240) -> bytes:
+    # Smooth random blobs, different enough per frame to survive dedupe
+    rng = np.random.default_rng(seed)
+    return _save_gif([
+        Image.fromarray(rng.integers(0, 256, (6, 6, 3), dtype=np.uint8)).resize((size, size), Image.BILINEAR)
+        for _ in range(count)
+    ])
+
+
+def frame_hashes(data: bytes) -> list:
+    return extract_keyframes(data)["frameHashes"]
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """In-memory stand-in for the Cosmos DB frame band documents."""
+    documents = {}
+    analyses = {}
+
+    def add(hashes: list, analysis_hash: str):
+        analyses[analysis_hash] = {"id": analysis_hash, "analysis": {"verdict": "Reliable"}}
+        bands = {}
+        for frame_hash in filter(storage._is_indexable_frame, hashes):
+            for band_id in storage._frame_band_ids(frame_hash):
+                bands.setdefault(band_id, []).append(frame_hash)
+        for band_id, band_frames in bands.items():
+            storage._add_frames(documents.setdefault(band_id, {"id": band_id}), band_frames, analysis_hash)
+
+    monkeypatch.setattr(storage, "get_analyses_by_hashes", lambda ids: {i: documents[i] for i in ids if i in documents})
+    monkeypatch.setattr(storage, "get_analysis_by_hash", lambda analysis_hash: analyses.get(analysis_hash))
+    add.analyses = analyses
+    return add
+
+
+def test_every_distinct_frame_is_hashed():
+    result = extract_keyframes(make_gif(), max_keyframes=9)
+    assert len(result["keyframes"]) == 9
+    assert len(result["frameHashes"]) == result["distinctFrames"] == 30
+
+
+def test_contact_sheet_tiles_the_chosen_keyframes():
+    data = make_gif()
+    result = extract_keyframes(data, max_keyframes=4, tile_size=240)
+    frames = _frames(data)
+    with Image.open(io.BytesIO(result["contactSheet"])) as sheet:
+        for position, keyframe in enumerate(result["keyframes"]):
+            left = (position % result["columns"]) * 240
+            top = (position // result["columns"]) * 240
+            tile = np.asarray(sheet.crop((left, top, left + 240, top + 240)), dtype=float)
+            frame = np.asarray(frames[keyframe["index"]], dtype=float)
+            assert np.abs(tile - frame).mean() < 8
+
+
+def test_trimmed_copy_reuses_analysis(index):
+    original = make_gif()
+    index(frame_hashes(original), "a" * 64)
+
+    trimmed = _save_gif(_frames(original)[10:])
+    match = storage.find_analysis_by_frames(frame_hashes(trimmed), min_ratio=0.6)
+    assert match["id"] == "a" * 64
+
+
+def test_resized_copy_reuses_analysis(index):
+    original = make_gif()
+    index(frame_hashes(original), "a" * 64)
+
+    resized = _save_gif([frame.resize((180, 180), Image.LANCZOS) for frame in _frames(original)])
+    hashes = frame_hashes(resized)
+    assert set(hashes) != set(frame_hashes(original))
+    match = storage.find_analysis_by_frames(hashes, min_ratio=0.6)
+    assert match["id"] == "a" * 64
+
+
+def test_unrelated_animation_is_not_matched(index):
+    index(frame_hashes(make_gif(seed=7)), "a" * 64)
+    assert storage.find_analysis_by_frames(frame_hashes(make_gif(seed=8)), min_ratio=0.6) is None
+
+
+def test_shared_frames_keep_every_analysis(index):
+    hashes = frame_hashes(make_gif())
+    index(hashes, "a" * 64)
+    index(hashes, "b" * 64)
+
+    # The first analysis was invalidated; the frames still lead to the other
+    del index.analyses["b" * 64]
+    assert storage.find_analysis_by_frames(hashes, min_ratio=0.6)["id"] == "a" * 64
+    del index.analyses["a" * 64]
+    assert storage.find_analysis_by_frames(hashes, min_ratio=0.6) is None
+
+
+def test_add_frames_merges_into_existing_document():
+    document = {"frames": {"00000000000000ff": ["a" * 64]}}
+    assert storage._add_frames(document, ["00000000000000ff", "0000000000000f0f"], "b" * 64)
+    assert document["frames"] == {
+        "00000000000000ff": ["a" * 64, "b" * 64],
+        "0000000000000f0f": ["b" * 64]
+    }
+    assert not storage._add_frames(document, ["00000000000000ff"], "b" * 64)
@@ -0,0 +1,22 @@
+from app.utils import compression
+from app.utils.compression import choose_encoding
+
+
+def test_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip, br;q=0") == "gzip"
+
+
+def test_falls_back_to_gzip_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("gzip, br") == "gzip"
+    assert choose_encoding("identity") is None
+    assert choose_encoding(None) is None
+
+
+def test_wildcard_accepts_unlisted_encodings(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding("*;q=0") is None
+    assert choose_encoding("gzip;q=0, *") is None
@@ -0,0 +1,92 @@
+import io
+import time
+import pytest
+from app.config.settings import Config
+from app.utils import image_pool
+from app.utils.deadline import DeadlineExceeded
+from app.utils.image_pool import ImagePool, ImageTaskError, ImageTaskTimeout, run_image_task
+
+
+def length_task(data: bytes, multiplier: int = 1) -> int:
+    return len(data) * multiplier
+
+
+def slow_task(data: bytes) -> None:
+    time.sleep(30)
+
+
+def failing_task(data: bytes) -> None:
+    raise ValueError("broken image")
+
+
+def deadline_task(data: bytes) -> None:
+    raise DeadlineExceeded("Request deadline exceeded")
+
+
+@pytest.fixture
+def pool():
+    pool = ImagePool(workers=1, start_method="spawn", memory_mb=0)
+    yield pool
+    pool.shutdown()
+
+
+def test_pool_runs_task_through_shared_memory(pool):
+    assert pool.run(length_task, b"x" * 1_000_000, timeout=10, multiplier=2) == 2_000_000
+
+
+def test_pool_reports_task_errors(pool):
+    with pytest.raises(ImageTaskError, match="ValueError: broken image"):
+        pool.run(failing_task, b"abc", timeout=10)
+    assert pool.run(length_task, b"abc", timeout=10) == 3
+
+
+def test_pool_replaces_worker_after_timeout(pool):
+    with pytest.raises(ImageTaskTimeout):
+        pool.run(slow_task, b"abc", timeout=0.5)
+    assert pool.run(length_task, b"hello", timeout=10) == 5
+
+
+def test_inline_mode_runs_on_calling_thread(monkeypatch):
+    monkeypatch.setattr(Config, "IMAGE_POOL_MODE", "inline")
+    monkeypatch.setattr(image_pool, "get_image_pool", lambda: pytest.fail("pool must not be used inline"))
+    assert run_image_task(length_task, b"abcd") == 4
+    with pytest.raises(ImageTaskError, match="broken image"):
+        run_image_task(failing_task, b"abcd")
+    with pytest.raises(DeadlineExceeded):
+        run_image_task(deadline_task, b"abcd")
+
+
+def _png(width: int, height: int) -> bytes:
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new("L", (width, height)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def test_inline_verify_rejects_bombs_without_global_settings(monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    from app.utils.image_tasks import verify_image
+
+    monkeypatch.setattr(Config, "IMAGE_POOL_MODE", "inline")
+    monkeypatch.setattr(Config, "IMAGE_MAX_PIXELS", 10_000)
+    default_limit = Image.MAX_IMAGE_PIXELS
+
+    assert run_image_task(verify_image, _png(100, 100))["width"] == 100
+    with pytest.raises(ImageTaskError, match="DecompressionBombError"):
+        run_image_task(verify_image, _png(101, 100))
+    assert Image.MAX_IMAGE_PIXELS == default_limit
+
+
+def test_pool_verify_rejects_bombs(monkeypatch):
+    pytest.importorskip("PIL.Image")
+    from app.utils.image_tasks import configure_worker, verify_image
+
+    # Spawned workers read their limit from the environment
+    monkeypatch.setenv("IMAGE_MAX_PIXELS", "10000")
+    pool = ImagePool(workers=1, start_method="spawn", memory_mb=0, initializer=configure_worker)
+    try:
+        assert pool.run(verify_image, _png(100, 100), timeout=20)["height"] == 100
+        with pytest.raises(ImageTaskError, match="DecompressionBomb"):
+            pool.run(verify_image, _png(200, 200), timeout=20)
+    finally:
+        pool.shutdown()
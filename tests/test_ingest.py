@@ -0,0 +1,93 @@
+import json
+import threading
+import pytest
+from app.cli import ingest
+
+
+@pytest.fixture
+def store(monkeypatch):
+    stored = {}
+    monkeypatch.setattr(ingest, "get_analysis_by_hash", lambda content_hash: stored.get(content_hash))
+    monkeypatch.setattr(ingest._RateLimiter, "pause", lambda self, seconds: None)
+    return stored
+
+
+def _write_jsonl(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def test_malformed_lines_are_skipped_and_checkpointed(tmp_path, store, monkeypatch):
+    calls = []
+
+    def fake_analyze_text(text, check_cache=True):
+        assert check_cache is False
+        calls.append(text)
+        store[ingest.hash_text(text)] = {"analysis": {}}
+
+    monkeypatch.setattr(ingest, "analyze_text", fake_analyze_text)
+    path = _write_jsonl(tmp_path / "corpus.jsonl", [
+        json.dumps({"text": "first record text"}),
+        "{not json",
+        json.dumps(["not", "an", "object"]),
+        json.dumps({"text": "second record text"})
+    ])
+
+    assert ingest.main([path, "--rate", "0", "--concurrency", "2"]) == 0
+    assert sorted(calls) == ["first record text", "second record text"]
+
+    checkpoint = json.loads((tmp_path / "corpus.jsonl.checkpoint.json").read_text())
+    assert checkpoint["offset"] == 4
+
+    # Resuming does not trip over the bad lines again
+    assert ingest.main([path, "--rate", "0"]) == 0
+    assert len(calls) == 2
+
+
+def test_failed_analysis_does_not_mark_duplicates_done(store, monkeypatch):
+    attempts = []
+
+    def flaky_analyze_text(text, check_cache=True):
+        attempts.append(text)
+        if len(attempts) == 1:
+            raise ValueError("LLM unavailable")
+        store[ingest.hash_text(text)] = {"analysis": {}}
+
+    monkeypatch.setattr(ingest, "analyze_text", flaky_analyze_text)
+    ingester = ingest.Ingester(rate_per_minute=0, max_retries=0)
+
+    with pytest.raises(ValueError):
+        ingester.ingest({"text": "the same viral claim"})
+    ingester.ingest({"text": "the same viral claim"})
+    ingester.ingest({"text": "the same viral claim"})
+
+    assert len(attempts) == 2
+    assert ingester.stats["analyzed"] == 1
+    assert ingester.stats["duplicates"] == 1
+
+
+def test_duplicate_waits_for_in_flight_attempt(store, monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    attempts = []
+
+    def slow_analyze_text(text, check_cache=True):
+        attempts.append(text)
+        started.set()
+        release.wait(5)
+        store[ingest.hash_text(text)] = {"analysis": {}}
+
+    monkeypatch.setattr(ingest, "analyze_text", slow_analyze_text)
+    ingester = ingest.Ingester(rate_per_minute=0, max_retries=0)
+
+    first = threading.Thread(target=ingester.ingest, args=({"text": "shared content here"},))
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=ingester.ingest, args=({"text": "shared content here"},))
+    second.start()
+    release.set()
+    first.join(5)
+    second.join(5)
+
+    assert len(attempts) == 1
+    assert ingester.stats["duplicates"] == 1
@@ -0,0 +1,57 @@
+import pytest
+from app.config.settings import Config
+from app.services import llm_analysis, llm_router
+
+
+@pytest.fixture(autouse=True)
+def fast_tier(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_CASCADE_ENABLED", True)
+    monkeypatch.setattr(llm_analysis, "has_tier", lambda tier: True)
+
+
+def _clear_image_answer(**overrides):
+    answer = {
+        "riskLevel": "low",
+        "credibilityScore": 95,
+        "verdict": "Reliable",
+        "explanation": "Plain photo.",
+        "confidence": 95,
+        **{key: "..." for key in llm_analysis.IMAGE_DETAIL_KEYS}
+    }
+    answer.update(overrides)
+    return answer
+
+
+def test_clear_fast_answer_is_accepted():
+    result = llm_analysis._run_cascade(
+        "image", lambda content: _clear_image_answer(), lambda content: pytest.fail("escalated"),
+        b"img", required_keys=llm_analysis.IMAGE_DETAIL_KEYS
+    )
+    assert result["modelTier"] == "fast"
+
+
+def test_fast_answer_missing_detail_fields_is_escalated():
+    fast = _clear_image_answer()
+    del fast["veracityCheck"]
+    result = llm_analysis._run_cascade(
+        "image", lambda content: fast, lambda content: _clear_image_answer(credibilityScore=90),
+        b"img", required_keys=llm_analysis.IMAGE_DETAIL_KEYS
+    )
+    assert result["modelTier"] == "full"
+
+
+def test_low_confidence_fast_answer_is_escalated():
+    result = llm_analysis._run_cascade(
+        "image", lambda content: _clear_image_answer(confidence=20), lambda content: _clear_image_answer(),
+        b"img"
+    )
+    assert result["modelTier"] == "full"
+
+
+def test_has_tier_parses_deployment_config_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_router, "_tier_configured", {})
+    monkeypatch.setattr(llm_router, "get_deployment_configs", lambda tier: calls.append(tier) or [])
+    assert not llm_router.has_tier("fast")
+    assert not llm_router.has_tier("fast")
+    assert calls == ["fast"]
@@ -0,0 +1,111 @@
+import threading
+import time
+import pytest
+from app.config.settings import Config
+from app.services.llm_router import Deployment, LLMRouter
+from app.utils.deadline import request_deadline
+
+
+class ApiError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+class FakeCompletions:
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+
+    def create(self, model, timeout, **kwargs):
+        self.calls.append(timeout)
+        return self.behaviour()
+
+
+def _deployment(name, behaviour):
+    deployment = Deployment(name, "https://example", "key", name, "2024-02-15-preview", 1)
+    completions = FakeCompletions(behaviour)
+    deployment._client = type("Client", (), {"chat": type("Chat", (), {"completions": completions})()})()
+    return deployment, completions
+
+
+def _raise(error):
+    def behaviour():
+        raise error
+    return behaviour
+
+
+@pytest.fixture(autouse=True)
+def no_hedging(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_HEDGE_ENABLED", False)
+
+
+def test_fails_over_on_server_error():
+    broken, _ = _deployment("broken", _raise(ApiError(500)))
+    healthy, _ = _deployment("healthy", lambda: "answer")
+    broken._latency = 0.0
+    healthy._latency = 10.0
+    assert LLMRouter([broken, healthy]).chat_completion(messages=[]) == "answer"
+
+
+def test_throttled_deployment_is_skipped_until_retry_after():
+    throttled, throttled_calls = _deployment("throttled", _raise(ApiError(429, {"retry-after": "30"})))
+    healthy, _ = _deployment("healthy", lambda: "answer")
+    throttled._latency = 0.0
+    healthy._latency = 10.0
+    router = LLMRouter([throttled, healthy])
+
+    assert router.chat_completion(messages=[]) == "answer"
+    assert router.chat_completion(messages=[]) == "answer"
+    assert len(throttled_calls.calls) == 1
+    assert not throttled.is_available(time.monotonic())
+
+
+def test_client_errors_are_not_retried():
+    bad_request, _ = _deployment("a", _raise(ApiError(400)))
+    other, other_calls = _deployment("b", lambda: "answer")
+    bad_request._latency = 0.0
+    other._latency = 10.0
+    with pytest.raises(ApiError):
+        LLMRouter([bad_request, other]).chat_completion(messages=[])
+    assert other_calls.calls == []
+
+
+def test_call_timeout_is_bounded_by_request_deadline(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_TIMEOUT", 30)
+    deployment, completions = _deployment("only", lambda: "answer")
+    router = LLMRouter([deployment])
+
+    router.chat_completion(messages=[])
+    with request_deadline(2):
+        router.chat_completion(messages=[])
+    assert completions.calls[0] == 30
+    assert 0 < completions.calls[1] <= 2
+
+
+def test_hedge_returns_first_answer_and_abandons_the_loser(monkeypatch):
+    monkeypatch.setattr(Config, "LLM_HEDGE_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_HEDGE_MIN_DELAY", 0.05)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "slow"
+
+    slow_deployment, _ = _deployment("slow", slow)
+    fast_deployment, _ = _deployment("fast", lambda: "fast")
+    slow_deployment._latency = 0.0
+    slow_deployment._latencies.extend([0.01] * 10)
+    fast_deployment._latency = 10.0
+
+    router = LLMRouter([slow_deployment, fast_deployment])
+    assert router.chat_completion(messages=[]) == "fast"
+    assert slow_deployment.stats()["inFlight"] == 1
+
+    release.set()
+    for _ in range(100):
+        if slow_deployment.stats()["inFlight"] == 0:
+            break
+        time.sleep(0.01)
+    assert slow_deployment.stats()["inFlight"] == 0
@@ -0,0 +1,46 @@
+from app.utils.page_resolvers import InstagramResolver, read_head, resolve_from_url
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, content_type: str, encoding: str = None):
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.encoding = encoding
+        self.closed = False
+        self.read = 0
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            self.read += chunk_size
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def test_instagram_resolver_does_not_resolve_its_own_output():
+    image_url = resolve_from_url("https://www.instagram.com/p/ABC123/?igsh=x")
+    assert image_url == "https://www.instagram.com/p/ABC123/media/?size=l"
+    assert not InstagramResolver().matches(image_url)
+    assert resolve_from_url(image_url) is None
+
+
+def test_read_head_uses_meta_charset_when_header_has_none():
+    body = '<html><head><meta charset="utf-8"><meta property="og:title" content="Café"></head><body>'.encode("utf-8")
+    # requests reports ISO-8859-1 for text/html without a charset parameter
+    head = read_head(FakeResponse(body, "text/html", encoding="ISO-8859-1"))
+    assert head.meta["og:title"] == "Café"
+
+
+def test_read_head_defaults_to_utf8_and_honours_header_charset():
+    body = '<head><meta name="twitter:image" content="/é.png"></head>'
+    assert read_head(FakeResponse(body.encode("utf-8"), "text/html", "ISO-8859-1")).meta["twitter:image"] == "/é.png"
+    latin = read_head(FakeResponse(body.encode("latin-1"), "text/html; charset=latin-1", "latin-1"))
+    assert latin.meta["twitter:image"] == "/é.png"
+
+
+def test_read_head_stops_at_body():
+    response = FakeResponse(b"<head></head><body>" + b"x" * 100_000, "text/html")
+    read_head(response)
+    assert response.closed
+    assert response.read < 100_000
@@ -0,0 +1,94 @@
+import itertools
+import pytest
+from app.cli.rescore import rescore_batch, _columns
+from app.services import scoring_rules
+from app.services.image_scoring import calculate_image_credibility, calculate_final_image_result
+from app.services.scoring_rules import load_scoring_rules, compile_image_rules, normalize_verdict
+
+pytest.importorskip("numpy")
+
+RISKS = ["low", "medium", "high", ""]
+AI_PROBABILITIES = [0, 10, 20, 49, 50, 79, 80, 100]
+LLM_RESULTS = [
+    None,
+    {"credibilityScore": 90, "verdict": "Reliable"},
+    {"credibilityScore": 75, "verdict": "Questionable"},
+    {"credibilityScore": 60, "verdict": "Reliable"},
+    {"credibilityScore": 30, "verdict": "High Risk"}
+]
+
+
+def _cases():
+    for metadata_risk, reused, ai_prob, llm in itertools.product(RISKS, RISKS, AI_PROBABILITIES, LLM_RESULTS):
+        if llm is None and ai_prob:
+            # Without an LLM call there is no AI-generation probability
+            continue
+        yield metadata_risk, reused, ai_prob, llm
+
+
+def _scalar(metadata_risk, reused, ai_prob, llm) -> dict:
+    llm_result = {**llm, "aiGeneratedProbability": ai_prob} if llm else {}
+    credibility = calculate_image_credibility({"metadataRisk": metadata_risk}, {"reusedLikelihood": reused}, ai_prob)
+    return calculate_final_image_result(llm_result, credibility)
+
+
+def _document(metadata_risk, reused, ai_prob, llm, result: dict) -> dict:
+    # Shaped like the documents analyze_image stores
+    return {
+        "id": "a" * 64,
+        "analysis": {
+            "status": "processed",
+            "metadata": {"metadataRisk": metadata_risk},
+            "tracing": {"reusedLikelihood": reused},
+            "llmAnalysis": {
+                "credibilityScore": llm["credibilityScore"],
+                "verdict": normalize_verdict(llm["verdict"]),
+                "aiGeneratedProbability": ai_prob
+            } if llm else None,
+            "credibilityScore": result["credibilityScore"],
+            "verdict": result["verdict"]
+        }
+    }
+
+
+@pytest.fixture
+def rules(monkeypatch):
+    """Point the scalar scorers at the given rules and return them."""
+    def use(overrides: dict = None) -> dict:
+        active = scoring_rules._deep_merge(load_scoring_rules(), overrides or {})
+        monkeypatch.setattr(scoring_rules, "_active_rules", active)
+        return active
+    return use
+
+
+def test_vectorized_evaluator_matches_scalar_scoring(rules):
+    active = rules()
+    cases = list(_cases())
+    documents = [_document(*case, _scalar(*case)) for case in cases]
+
+    results = compile_image_rules(active)(_columns(documents, active))
+    for i, case in enumerate(cases):
+        expected = _scalar(*case)
+        assert results["credibilityScore"][i] == expected["credibilityScore"], case
+        assert results["verdict"][i] == expected["verdict"], case
+
+
+def test_unchanged_rules_write_nothing_back(rules):
+    active = rules()
+    documents = [_document(*case, _scalar(*case)) for case in _cases()]
+    assert rescore_batch(documents, active, compile_image_rules(active)) == []
+
+
+def test_changed_rules_rescore_to_scalar_results(rules):
+    cases = list(_cases())
+    documents = [_document(*case, _scalar(*case)) for case in cases]
+
+    active = rules({"image": {"bands": [[80, "Reliable"], [50, "Questionable"]]}, "imageFinal": {"bands": [[85, None], [50, "Questionable"]]}})
+    changed = rescore_batch(documents, active, compile_image_rules(active))
+    assert changed
+
+    for case, document in zip(cases, documents):
+        expected = _scalar(*case)
+        assert document["analysis"]["credibilityScore"] == expected["credibilityScore"], case
+        assert document["analysis"]["verdict"] == expected["verdict"], case
+    assert rescore_batch(documents, active, compile_image_rules(active)) == []
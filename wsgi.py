@@ -0,0 +1,20 @@
+"""
+WSGI entry point for production servers (gunicorn.conf.py points at wsgi:app).
+
+The app is built here rather than in run.py because image pool workers
+started with the spawn method re-import the launching script; keeping
+run.py free of module-level app construction keeps those workers light.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.main import create_app
+from app.services.warmup import preload_modules
+
+# gunicorn loads this module in the master (preload_app): import the client
+# libraries there so workers share them, but create clients only per worker.
+preload_modules()
+app = create_app()